@@ -1,6 +1,5 @@
-from passlib.context import CryptContext
-from jose import JWTError, jwt
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
@@ -8,11 +7,17 @@ from sqlmodel import Session, select
 
 from app.config import get_settings
 from app.database import get_session
+from app.tracing import span
 
 settings = get_settings()
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@lru_cache(maxsize=1)
+def get_pwd_context():
+    """Password hashing context, built on first use so passlib/bcrypt load lazily."""
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -20,16 +25,20 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 def hash_password(password: str) -> str:
     """Hash a plain text password."""
-    return pwd_context.hash(password)
+    with span("auth.password_hash"):
+        return get_pwd_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    with span("auth.password_verify"):
+        return get_pwd_context().verify(plain_password, hashed_password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
+    from jose import jwt
+    
     to_encode = data.copy()
     
     if expires_delta:
@@ -48,6 +57,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 def verify_token(token: str) -> Optional[dict]:
     """Verify and decode a JWT token."""
+    from jose import JWTError, jwt
+    
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         return payload
@@ -70,7 +81,8 @@ async def get_current_user(
     )
     
     try:
-        payload = verify_token(token)
+        with span("auth.jwt_decode"):
+            payload = verify_token(token)
         if payload is None:
             print(f"DEBUG: Token verification failed for token: {token[:10]}...")
             raise credentials_exception
@@ -80,7 +92,8 @@ async def get_current_user(
             print("DEBUG: Token has no sub")
             raise credentials_exception
         
-        user = session.get(User, user_id)
+        with span("auth.user_lookup", **{"enduser.id": str(user_id)}):
+            user = session.get(User, user_id)
         if user is None:
             print(f"DEBUG: User not found for id: {user_id}")
             raise credentials_exception
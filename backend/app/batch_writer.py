@@ -0,0 +1,118 @@
+"""
+A single serialized writer for hot small writes.
+
+BatchWriter is one thread that drains a queue and applies whatever is
+pending in a single transaction on one connection. View counts are merged
+per note, so a burst of reads costs one UPDATE per note and one commit
+instead of an UPDATE and a commit per request. On SQLite this also keeps
+requests from contending for the database write lock.
+"""
+import queue
+import threading
+from collections import Counter
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.engine import Connection, Engine
+
+_STOP = object()
+
+
+class BatchWriter:
+    """
+    Serializes writes on one thread and connection. Queued work is drained in
+    batches of up to `max_batch` and committed together; view counts queued
+    in the same batch are merged into one UPDATE per note.
+    """
+
+    def __init__(self, engine: Engine, max_batch: int = 500):
+        self.engine = engine
+        self.max_batch = max_batch
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, func: Callable[[Connection], object]) -> Future:
+        """Run func(connection) on the writer inside a transaction; returns a Future with its result."""
+        future: Future = Future()
+        self._put((func, future))
+        return future
+
+    def record_view(self, note_id: int) -> None:
+        """Queue a +1 to a note's view count (fire and forget)."""
+        self._put(note_id)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Apply everything still queued and stop the writer thread."""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _put(self, item) -> None:
+        if self._thread is None:
+            self._start()
+        self._queue.put(item)
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        from app.models import Note
+
+        view_update = (
+            update(Note)
+            .where(Note.id == bindparam("note_id"))
+            .values(view_count=Note.view_count + bindparam("views"))
+        )
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stopping = _STOP in batch
+            views = Counter(item for item in batch if isinstance(item, int))
+            jobs = [item for item in batch if isinstance(item, tuple)]
+            try:
+                # Checked out per batch, so an idle writer does not hold a pooled connection
+                with self.engine.connect() as connection:
+                    self._apply(connection, view_update, views, jobs)
+            except Exception as e:
+                print(f"Batch writer failed: {e}")
+                for _, future in jobs:
+                    if not future.done():
+                        future.set_exception(e)
+            if stopping:
+                return
+
+    def _apply(self, connection: Connection, view_update, views: Counter, jobs) -> None:
+        results = []
+        with connection.begin():
+            if views:
+                connection.execute(
+                    view_update, [{"note_id": note_id, "views": count} for note_id, count in views.items()]
+                )
+            for func, future in jobs:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    # A failing job only rolls back its own savepoint
+                    with connection.begin_nested():
+                        result = func(connection)
+                except Exception as e:
+                    results.append((future, None, e))
+                else:
+                    results.append((future, result, None))
+        # Results are published only once the batch is committed
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
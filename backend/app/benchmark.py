@@ -0,0 +1,263 @@
+"""
+Endpoint benchmark suite with regression tracking.
+
+Boots app.main:app in-process (ASGI transport, no network) against a generated
+SQLite dataset or an existing database, drives the hot routes under
+configurable concurrency and reports throughput and p50/p95/p99 latency.
+Results are written as JSON and can be compared against a saved baseline;
+any regression beyond the tolerance makes the run exit with status 1.
+
+Run from the backend directory:
+    python -m app.benchmark --notes 50000 --concurrency 16 --output bench.json
+    python -m app.benchmark --baseline bench_baseline.json --tolerance 0.2
+    python -m app.benchmark --database-url postgresql://... --routes search,notes
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+# Route name -> endpoint it exercises
+ROUTES = {
+    "notes": "GET /notes",
+    "note": "GET /notes/{note_id}",
+    "search": "GET /search",
+    "subjects": "GET /subjects",
+    "login": "POST /auth/login",
+    "upload": "POST /upload",
+}
+
+BENCH_EMAIL = "bench@loadtest.slnotes.lk"
+BENCH_PASSWORD = "bench123"
+SEARCH_TERMS = ["equation", "energy", "formula", "velocity", "revision", "chemestry", "සමීකරණය", "பரீட்சை"]
+UPLOAD_BODY = b"%PDF-1.4\n%%EOF\n" + b"0" * 64 * 1024
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float], errors: int, wall_seconds: float) -> dict:
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        "requests": count,
+        "errors": errors,
+        "throughput_rps": round(count / wall_seconds, 2) if wall_seconds else 0.0,
+        "mean_ms": round(sum(latencies) / count * 1000, 2) if count else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+async def run_route(
+    send: Callable[[int], Awaitable],
+    requests: int,
+    concurrency: int,
+    warmup: int,
+) -> dict:
+    """Issue `requests` calls through `concurrency` workers and summarize latencies."""
+    for i in range(warmup):
+        await send(i)
+
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < requests:
+            index = next_index
+            next_index += 1
+            started = time.perf_counter()
+            response = await send(index)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Return human-readable regressions of results against a baseline."""
+    regressions = []
+    for route, base in baseline.get("routes", {}).items():
+        current = results["routes"].get(route)
+        if current is None:
+            continue
+        if base["p95_ms"] and current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{route}: p95 {current['p95_ms']}ms vs baseline {base['p95_ms']}ms")
+        if base["throughput_rps"] and current["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{route}: throughput {current['throughput_rps']} rps vs baseline {base['throughput_rps']} rps"
+            )
+        if current["errors"] > base.get("errors", 0):
+            regressions.append(f"{route}: {current['errors']} errors vs baseline {base.get('errors', 0)}")
+    return regressions
+
+
+def _prepare_environment(args, workdir: Path) -> None:
+    """Point the app at the benchmark database before anything imports app.config."""
+    if "app.config" in sys.modules:
+        raise RuntimeError("app.config was imported before the benchmark environment was set")
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{workdir / 'bench.db'}"
+    os.environ["DEBUG"] = "False"
+    os.environ["UPLOAD_DIR"] = str(workdir / "uploads")
+    # Every request comes from one client, which the limits would otherwise reject (429)
+    os.environ["RATE_LIMIT_ENABLED"] = "False"
+
+
+def _ensure_bench_user(engine) -> None:
+    from sqlmodel import Session, select
+    from app.models import User
+    from app.auth_utils import hash_password
+
+    with Session(engine) as session:
+        if session.exec(select(User).where(User.email == BENCH_EMAIL)).first():
+            return
+        session.add(User(
+            full_name="Benchmark User",
+            email=BENCH_EMAIL,
+            hashed_password=hash_password(BENCH_PASSWORD),
+            is_verified=True,
+        ))
+        session.commit()
+
+
+async def _run(args, routes: List[str]) -> dict:
+    import httpx
+    from sqlmodel import Session, select, func
+    from app.main import app
+    from app.database import engine
+    from app.models import Note
+
+    with Session(engine) as session:
+        note_ids = session.exec(select(Note.id).where(Note.is_published == True).limit(10000)).all()
+        total_notes = session.exec(select(func.count(Note.id))).one()
+    if not note_ids and {"note"} & set(routes):
+        raise RuntimeError("The database has no published notes to benchmark")
+
+    rng = random.Random(args.seed)
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            login = await client.post("/auth/login", data={"username": BENCH_EMAIL, "password": BENCH_PASSWORD})
+            login.raise_for_status()
+            auth = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+            senders: Dict[str, Callable[[int], Awaitable]] = {
+                "notes": lambda i: client.get("/notes", params={"page": rng.randint(1, 20), "per_page": 20}),
+                "note": lambda i: client.get(f"/notes/{rng.choice(note_ids)}"),
+                "search": lambda i: client.get("/search", params={"q": rng.choice(SEARCH_TERMS)}),
+                "subjects": lambda i: client.get("/subjects"),
+                "login": lambda i: client.post(
+                    "/auth/login", data={"username": BENCH_EMAIL, "password": BENCH_PASSWORD}
+                ),
+                "upload": lambda i: client.post(
+                    "/upload", files={"file": ("bench.pdf", UPLOAD_BODY, "application/pdf")}, headers=auth
+                ),
+            }
+
+            for route in routes:
+                # bcrypt-bound routes are orders of magnitude slower, so run fewer requests
+                requests = max(1, args.requests // 10) if route == "login" else args.requests
+                print(f"  ⏱  {ROUTES[route]} x{requests} @ {args.concurrency}...")
+                results[route] = await run_route(senders[route], requests, args.concurrency, args.warmup)
+
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "database": engine.dialect.name,
+        "notes": total_notes,
+        "concurrency": args.concurrency,
+        "python": platform.python_version(),
+        "routes": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the hot API routes in-process")
+    parser.add_argument("--database-url", help="Existing database to benchmark (default: generated SQLite)")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--subjects", type=int, default=24)
+    parser.add_argument("--notes", type=int, default=20000)
+    parser.add_argument("--routes", default=",".join(ROUTES), help=f"Comma-separated subset of: {', '.join(ROUTES)}")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per route")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression as a fraction")
+    parser.add_argument("--save-baseline", action="store_true", help="Also write results to --baseline")
+    args = parser.parse_args()
+
+    routes = [r.strip() for r in args.routes.split(",") if r.strip()]
+    unknown = [r for r in routes if r not in ROUTES]
+    if unknown:
+        parser.error(f"Unknown routes: {', '.join(unknown)}")
+
+    workdir = Path(tempfile.mkdtemp(prefix="sl_notes_bench_"))
+    try:
+        _prepare_environment(args, workdir)
+        from app.database import engine
+        from app.generate_data import generate
+
+        if not args.database_url:
+            print(f"\n🏭 Generating dataset ({args.notes:,} notes)...\n")
+            generate(engine, users=args.users, subjects=args.subjects, notes=args.notes, seed=args.seed)
+        _ensure_bench_user(engine)
+
+        print("\n🚀 Running benchmarks...\n")
+        results = asyncio.run(_run(args, routes))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\n{'route':<24}{'rps':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'errors':>8}")
+    for route, stats in results["routes"].items():
+        print(
+            f"{ROUTES[route]:<24}{stats['throughput_rps']:>10}{stats['p50_ms']:>10}"
+            f"{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['errors']:>8}"
+        )
+
+    Path(args.output).write_text(json.dumps(results, indent=2))
+    print(f"\n✓ Results written to {args.output}")
+
+    if args.baseline and args.save_baseline:
+        Path(args.baseline).write_text(json.dumps(results, indent=2))
+        print(f"✓ Baseline saved to {args.baseline}")
+    elif args.baseline:
+        baseline_path = Path(args.baseline)
+        if not baseline_path.exists():
+            print(f"✗ Baseline {args.baseline} not found (use --save-baseline to create it)")
+            sys.exit(1)
+        regressions = compare(results, json.loads(baseline_path.read_text()), args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print(f"\n✅ No regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
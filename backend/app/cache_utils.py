@@ -0,0 +1,107 @@
+"""
+Small in-process caching helpers.
+"""
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.metrics import singleflight_requests_total
+
+
+class TTLCache:
+    """Thread-safe key/value cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, ttl: float, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value for `ttl` seconds."""
+        with self._lock:
+            if len(self._entries) >= self.max_entries and key not in self._entries:
+                self._evict()
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _evict(self) -> None:
+        # Drop expired entries first, then the entry closest to expiry
+        now = time.monotonic()
+        for key in [k for k, (exp, _) in self._entries.items() if exp <= now]:
+            del self._entries[key]
+        if len(self._entries) >= self.max_entries:
+            oldest = min(self._entries, key=lambda k: self._entries[k][0])
+            del self._entries[oldest]
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls: the first caller for a key runs the
+    function in the threadpool and every caller arriving while it runs awaits
+    the same result (or exception). With cache_ttl > 0, results are also kept
+    for that many seconds.
+    """
+
+    def __init__(self, name: str, cache_ttl: float = 0, max_entries: int = 1024):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._cache = TTLCache(cache_ttl, max_entries) if cache_ttl > 0 else None
+
+    async def do(self, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        if self._cache is not None:
+            cached = self._cache.get(key)
+            if cached is not None:
+                singleflight_requests_total.inc(self.name, "cached")
+                return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            singleflight_requests_total.inc(self.name, "leader")
+            # A separate task, so a disconnecting caller does not cancel the shared work
+            task = asyncio.ensure_future(run_in_threadpool(func, *args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            singleflight_requests_total.inc(self.name, "follower")
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled():
+            return
+        # Retrieve the exception even if every caller went away
+        if task.exception() is None and self._cache is not None:
+            self._cache.set(key, task.result())
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one cached result, or all of them."""
+        if self._cache is None:
+            return
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.delete(key)
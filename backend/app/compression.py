@@ -0,0 +1,262 @@
+"""
+Negotiated response compression (zstd, brotli, gzip).
+
+Text-like responses of at least COMPRESSION_MIN_SIZE bytes are compressed
+with the best encoding both the client (Accept-Encoding) and the server
+support; brotli and zstd are used only when the optional `brotli` and
+`zstandard` packages are installed. Streaming responses are compressed chunk
+by chunk and flushed as they go, so NDJSON/CSV exports still stream.
+
+Stable responses (`Cache-Control: public, max-age=N` without no-cache or
+no-store) are compressed once at a high level and kept in a bounded
+in-memory cache keyed by a digest of the uncompressed body, so hot payloads
+are not recompressed for every request. Everything else, including
+`public, no-cache` responses whose body changes on every request (view
+counts), uses fast levels.
+"""
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from app.config import get_settings
+
+settings = get_settings()
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+# (dynamic level, level for cached responses)
+_LEVELS = {"gzip": (6, 9), "br": (4, 9), "zstd": (3, 15)}
+
+
+def available_encodings() -> List[str]:
+    """Configured encodings, in server preference order, whose libraries are installed."""
+    installed = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+    return [e.strip() for e in settings.COMPRESSION_ENCODINGS.split(",") if installed.get(e.strip())]
+
+
+def choose_encoding(accept_encoding: str, supported: List[str]) -> Optional[str]:
+    """Pick the accepted encoding with the highest q (ties go to server preference), or None."""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for encoding in supported:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "gzip":
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return compressor.compress(body) + compressor.flush()
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    return zstandard.ZstdCompressor(level=level).compress(body)
+
+
+class StreamCompressor:
+    """Incremental compressor whose output can be flushed after every chunk."""
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        elif encoding == "br":
+            self._compressor = brotli.Compressor(quality=level)
+        else:
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == "gzip":
+            return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        if self.encoding == "br":
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+class CompressedCache:
+    """LRU of compressed bodies keyed by (body digest, encoding), bounded by total size."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._size = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[bytes, str], bytes]" = OrderedDict()
+
+    def get_or_compress(self, body: bytes, encoding: str) -> bytes:
+        key = (hashlib.blake2b(body, digest_size=16).digest(), encoding)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                return cached
+
+        compressed = compress(body, encoding, _LEVELS[encoding][1])
+        if len(compressed) > self.max_bytes:
+            return compressed
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = compressed
+                self._size += len(compressed)
+                while self._size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._size -= len(evicted)
+        return compressed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+compressed_cache = CompressedCache(settings.COMPRESSION_CACHE_MAX_BYTES)
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _is_compressible(headers: List[Tuple[bytes, bytes]]) -> bool:
+    if _header(headers, b"content-encoding") is not None:
+        return False
+    content_type = (_header(headers, b"content-type") or b"").decode("latin-1").lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _is_stable(headers: List[Tuple[bytes, bytes]]) -> bool:
+    """Whether the response may be served unchanged for a while, so its compressed body is worth caching."""
+    directives = {}
+    for directive in (_header(headers, b"cache-control") or b"").lower().split(b","):
+        name, _, value = directive.strip().partition(b"=")
+        directives[name] = value
+    if b"public" not in directives or b"no-cache" in directives or b"no-store" in directives:
+        return False
+    max_age = directives.get(b"max-age", b"")
+    return max_age.isdigit() and int(max_age) > 0
+
+
+def _with_encoding(headers: List[Tuple[bytes, bytes]], encoding: str, length: Optional[int]):
+    headers = [(k, v) for k, v in headers if k.lower() not in (b"content-length", b"etag")]
+    headers.append((b"content-encoding", encoding.encode("latin-1")))
+    if length is not None:
+        headers.append((b"content-length", str(length).encode("latin-1")))
+    return _add_vary(headers)
+
+
+def _add_vary(headers: List[Tuple[bytes, bytes]]):
+    vary = _header(headers, b"vary")
+    if vary is None:
+        return headers + [(b"vary", b"Accept-Encoding")]
+    if b"accept-encoding" in vary.lower():
+        return headers
+    return [(k, v) for k, v in headers if k.lower() != b"vary"] + [(b"vary", vary + b", Accept-Encoding")]
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing eligible responses with the negotiated encoding."""
+
+    def __init__(self, app):
+        self.app = app
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+
+        accept = dict(scope.get("headers") or []).get(b"accept-encoding", b"").decode("latin-1")
+        encoding = choose_encoding(accept, self.encodings) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        streamer: Optional[StreamCompressor] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, streamer, passthrough
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                if message["status"] in (204, 304) or message["status"] < 200 or not _is_compressible(headers):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Wait for the first body chunk to decide
+                    start_message = {**message, "headers": headers}
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            headers = start_message["headers"] if start_message else None
+
+            if streamer is None and headers is not None and not more_body:
+                # Complete body in one message
+                if len(body) < settings.COMPRESSION_MIN_SIZE:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                if _is_stable(headers):
+                    compressed = compressed_cache.get_or_compress(body, encoding)
+                else:
+                    compressed = compress(body, encoding, _LEVELS[encoding][0])
+                await send({**start_message, "headers": _with_encoding(headers, encoding, len(compressed))})
+                await send({"type": "http.response.body", "body": compressed, "more_body": False})
+                return
+
+            if streamer is None:
+                streamer = StreamCompressor(encoding, _LEVELS[encoding][0])
+                await send({**start_message, "headers": _with_encoding(headers, encoding, None)})
+                start_message = None
+
+            chunk = streamer.compress(body) if body else b""
+            if not more_body:
+                chunk += streamer.finish()
+            if chunk or not more_body:
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,340 @@
+"""
+Compressed storage of note content.
+
+Note.content uses the CompressedText column type. Bodies of at least
+CONTENT_COMPRESSION_MIN_SIZE characters are stored compressed, as text so
+the column type does not change:
+
+    "\\x1f" + "d" + <dictionary id> + ":" + base64(zstd with a trained dictionary)
+    "\\x1f" + "z" + base64(zlib)
+    "\\x1f" + "p" + text   (plain text that itself starts with "\\x1f")
+
+zstd needs the optional `zstandard` package and a trained dictionary
+(see below); otherwise zlib is used. Rows without the marker are plain text,
+so compressed and uncompressed rows can coexist, and since text starting
+with the marker is escaped, every marked value was written by this module.
+
+Values are returned from the database still encoded, as StoredText, and
+are only decoded where content is serialized (NoteResponse, search hits,
+exports) via decompress_text(). Values that cannot be decoded (corrupt, or
+larger than MAX_CONTENT_BYTES) come back as UNREADABLE_CONTENT instead of
+failing the request. SQLite gets a note_content() SQL function so content
+can still be searched with LIKE.
+
+CONTENT_COMPRESSION=auto enables this on SQLite only, since PostgreSQL
+already compresses large values (TOAST) and its trigram search needs
+plain text.
+
+Train a dictionary and compress existing rows, from the backend directory:
+    python -m app.content_compression --train-dictionary
+    python -m app.content_compression [--batch-size 500]
+    python -m app.content_compression --decompress   # back to plain text
+"""
+import argparse
+import base64
+import io
+import sys
+import threading
+import zlib
+from typing import Dict, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from sqlalchemy import event
+from sqlalchemy.types import TypeDecorator
+from sqlmodel import AutoString
+
+from app.config import get_settings
+
+settings = get_settings()
+
+MARKER = "\x1f"
+CODEC_ZLIB = "z"
+CODEC_ZSTD_DICT = "d"
+CODEC_PLAIN = "p"
+ZSTD_LEVEL = 9
+ZLIB_LEVEL = 9
+DICTIONARY_SIZE = 112 * 1024
+# Decoding stops here, so a crafted value cannot expand without bound
+MAX_CONTENT_BYTES = 32 * 1024 * 1024
+UNREADABLE_CONTENT = "[This note's content could not be read]"
+
+
+def compression_enabled() -> bool:
+    mode = settings.CONTENT_COMPRESSION.lower()
+    if mode == "auto":
+        return settings.DATABASE_URL.startswith("sqlite")
+    return mode == "on"
+
+
+class _Dictionaries:
+    """Process-wide cache of trained zstd dictionaries (loaded from the database on demand)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_id: Dict[int, "zstandard.ZstdCompressionDict"] = {}
+        self._active_id: Optional[int] = None
+        self._loaded = False
+
+    def _load(self) -> None:
+        from sqlmodel import Session, select
+        from app.database import engine
+        from app.models import CompressionDictionary
+
+        with Session(engine) as session:
+            rows = session.exec(select(CompressionDictionary).order_by(CompressionDictionary.id)).all()
+        for row in rows:
+            self._by_id[row.id] = zstandard.ZstdCompressionDict(row.data)
+            self._active_id = row.id
+        self._loaded = True
+
+    def active(self):
+        """(id, dictionary) used for new values, or None."""
+        if zstandard is None:
+            return None
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if self._active_id is None:
+                return None
+            return self._active_id, self._by_id[self._active_id]
+
+    def get(self, dictionary_id: int):
+        with self._lock:
+            if dictionary_id not in self._by_id:
+                self._load()
+            return self._by_id[dictionary_id]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._by_id.clear()
+            self._active_id = None
+            self._loaded = False
+
+
+dictionaries = _Dictionaries()
+
+
+class StoredText(str):
+    """A Note.content value as read from the database, still in its stored (marked) form."""
+
+
+def is_stored(value) -> bool:
+    return isinstance(value, StoredText)
+
+
+def encode_text(text: str, compress: bool = True, force: bool = False) -> str:
+    """
+    The stored form of plain text: compressed when `compress` is set and it is
+    long enough to actually get smaller, escaped when it starts with the marker.
+    """
+    if compress and (force or len(text) >= settings.CONTENT_COMPRESSION_MIN_SIZE):
+        raw = text.encode("utf-8")
+        active = dictionaries.active()
+        if active is not None:
+            dictionary_id, dictionary = active
+            payload = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=dictionary).compress(raw)
+            encoded = f"{MARKER}{CODEC_ZSTD_DICT}{dictionary_id}:{base64.b64encode(payload).decode('ascii')}"
+        else:
+            payload = zlib.compress(raw, ZLIB_LEVEL)
+            encoded = f"{MARKER}{CODEC_ZLIB}{base64.b64encode(payload).decode('ascii')}"
+        if force or len(encoded) < len(text):
+            return encoded
+    if text.startswith(MARKER):
+        return f"{MARKER}{CODEC_PLAIN}{text}"
+    return text
+
+
+def _inflate(payload: bytes) -> bytes:
+    decompressor = zlib.decompressobj()
+    raw = decompressor.decompress(payload, MAX_CONTENT_BYTES)
+    if decompressor.unconsumed_tail:
+        raise ValueError(f"Decompressed content exceeds {MAX_CONTENT_BYTES} bytes")
+    if not decompressor.eof:
+        raise ValueError("Compressed content is truncated")
+    return raw
+
+
+def _zstd_decompress(dictionary_id: int, payload: bytes) -> bytes:
+    if zstandard is None:
+        raise RuntimeError("Note content is zstd-compressed but the zstandard package is not installed")
+    decompressor = zstandard.ZstdDecompressor(dict_data=dictionaries.get(dictionary_id))
+    # Read through a stream so the frame's declared size is not trusted
+    raw = decompressor.stream_reader(io.BytesIO(payload)).read(MAX_CONTENT_BYTES + 1)
+    if len(raw) > MAX_CONTENT_BYTES:
+        raise ValueError(f"Decompressed content exceeds {MAX_CONTENT_BYTES} bytes")
+    return raw
+
+
+def decode_text(value):
+    """Plain text of a value in stored form; UNREADABLE_CONTENT if it cannot be decoded."""
+    if not isinstance(value, str) or not value.startswith(MARKER):
+        return value
+    codec = value[1:2]
+    try:
+        if codec == CODEC_PLAIN:
+            return value[2:]
+        if codec == CODEC_ZLIB:
+            return _inflate(base64.b64decode(value[2:], validate=True)).decode("utf-8")
+        if codec == CODEC_ZSTD_DICT:
+            dictionary_id, _, payload = value[2:].partition(":")
+            return _zstd_decompress(int(dictionary_id), base64.b64decode(payload, validate=True)).decode("utf-8")
+        raise ValueError(f"Unknown content codec {codec!r}")
+    except Exception as e:
+        # zlib.error, binascii.Error, zstd errors, a missing dictionary...
+        print(f"Could not decode note content: {e}")
+        return UNREADABLE_CONTENT
+
+
+def decompress_text(value):
+    """Plain text for a Note.content value (values not read from the database pass through)."""
+    if is_stored(value):
+        return decode_text(value)
+    return value
+
+
+class CompressedText(TypeDecorator):
+    """Text column stored compressed above a size threshold; reads return the stored form."""
+
+    impl = AutoString
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if is_stored(value):
+            # Read from the database and written back unchanged
+            return value
+        return encode_text(value, compress=compression_enabled())
+
+    def process_result_value(self, value, dialect):
+        # Decoded lazily, where the content is serialized (see decompress_text)
+        if value is not None and value.startswith(MARKER):
+            return StoredText(value)
+        return value
+
+
+def install_sqlite_functions(engine) -> None:
+    """Register note_content(value) on SQLite connections so compressed content can be searched."""
+    @event.listens_for(engine, "connect")
+    def register(dbapi_connection, connection_record):
+        dbapi_connection.create_function("note_content", 1, decode_text, deterministic=True)
+
+
+def searchable_content():
+    """SQL expression for note content as plain text."""
+    from sqlalchemy import func
+    from app.database import engine
+    from app.models import Note
+
+    if compression_enabled() and engine.dialect.name == "sqlite":
+        return func.note_content(Note.content)
+    return Note.content
+
+
+# Migration CLI
+def train_dictionary(session, sample_limit: int = 5000) -> int:
+    """Train a zstd dictionary from existing note bodies and store it; returns its id."""
+    from sqlmodel import select, func
+    from app.models import CompressionDictionary, Note
+
+    if zstandard is None:
+        raise RuntimeError("Training a dictionary needs the zstandard package")
+    samples = [
+        decompress_text(content).encode("utf-8")
+        for content in session.exec(select(Note.content).order_by(func.random()).limit(sample_limit)).all()
+    ]
+    if len(samples) < 10:
+        raise RuntimeError("Need at least 10 notes to train a dictionary")
+    trained = zstandard.train_dictionary(DICTIONARY_SIZE, samples)
+    row = CompressionDictionary(data=trained.as_bytes())
+    session.add(row)
+    session.commit()
+    session.refresh(row)
+    dictionaries.reset()
+    return row.id
+
+
+def migrate(session, batch_size: int, decompress: bool = False) -> Dict[str, int]:
+    """
+    Rewrite note content in id order, batch_size rows per transaction,
+    compressing (or decompressing) rows that need it. Returns row and byte counts.
+    """
+    from sqlalchemy import String, bindparam, update
+    from sqlmodel import select
+    from app.models import Note
+
+    statement = (
+        update(Note.__table__)
+        .where(Note.__table__.c.id == bindparam("note_id"))
+        # Plain String so values are written exactly as prepared here
+        .values(content=bindparam("new_content", type_=String()))
+    )
+    stats = {"scanned": 0, "rewritten": 0, "bytes_before": 0, "bytes_after": 0}
+    last_id = 0
+    while True:
+        rows = session.exec(
+            select(Note.id, Note.content).where(Note.id > last_id).order_by(Note.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        changes = []
+        for note_id, stored in rows:
+            stats["scanned"] += 1
+            text = decompress_text(stored)
+            if text == UNREADABLE_CONTENT:
+                # Leave corrupt rows as they are rather than overwrite them
+                continue
+            new_value = encode_text(text, compress=not decompress)
+            stats["bytes_before"] += len(stored.encode("utf-8"))
+            stats["bytes_after"] += len(new_value.encode("utf-8"))
+            if new_value != stored:
+                changes.append({"note_id": note_id, "new_content": new_value})
+
+        if changes:
+            session.connection().execute(statement, changes)
+            stats["rewritten"] += len(changes)
+        session.commit()
+    return stats
+
+
+def main():
+    from sqlmodel import Session
+    from app.database import engine, create_db_and_tables
+
+    parser = argparse.ArgumentParser(description="Compress or decompress stored note content")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--train-dictionary", action="store_true", help="Train a zstd dictionary first")
+    parser.add_argument("--decompress", action="store_true", help="Rewrite all content as plain text")
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    with Session(engine) as session:
+        if args.train_dictionary:
+            print("\n📚 Training zstd dictionary...")
+            try:
+                dictionary_id = train_dictionary(session)
+            except RuntimeError as e:
+                print(f"✗ {e}")
+                sys.exit(1)
+            print(f"✓ Dictionary {dictionary_id} is now used for new content")
+
+        if not args.decompress and not compression_enabled():
+            print("✗ Content compression is disabled (CONTENT_COMPRESSION); nothing to compress")
+            sys.exit(1)
+
+        print(f"\n🗜  {'Decompressing' if args.decompress else 'Compressing'} note content...\n")
+        stats = migrate(session, args.batch_size, decompress=args.decompress)
+
+    saved = stats["bytes_before"] - stats["bytes_after"]
+    print(f"✅ Rewrote {stats['rewritten']} of {stats['scanned']} notes: "
+          f"{stats['bytes_before']:,} → {stats['bytes_after']:,} bytes ({saved:,} saved)\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,147 @@
+from fastapi import Request
 from sqlmodel import create_engine, SQLModel, Session
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.pool import QueuePool
+import time
 from app.config import get_settings
+from app.metrics import db_pool_wait_seconds, register_pool_gauges
+from app import tracing
+from app.content_compression import install_sqlite_functions
+from app.rate_limit import client_key
+from app.batch_writer import BatchWriter
+from app.sqlite_utils import install_pragmas
+import app.sync_utils  # noqa: F401  (registers change-log session hooks)
 
 settings = get_settings()
 
-# Create engine with PostgreSQL-optimized settings
-connect_args = {}
-engine_kwargs = {
-    "echo": settings.DEBUG,
-}
-
-# Add connection pooling for PostgreSQL
-if settings.DATABASE_URL.startswith("postgresql"):
-    engine_kwargs.update({
-        "poolclass": QueuePool,
-        "pool_size": 5,
-        "max_overflow": 10,
-        "pool_pre_ping": True,  # Verify connections before using
-        "pool_recycle": 3600,   # Recycle connections after 1 hour
-    })
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_wait_seconds.observe(value=time.perf_counter() - started)
+
+
+def _create_engine(url: str) -> Engine:
+    """Create an engine with PostgreSQL-optimized settings."""
+    connect_args = {}
+    engine_kwargs = {
+        "echo": settings.DEBUG,
+    }
+
+    # Add connection pooling for PostgreSQL
+    if url.startswith("postgresql"):
+        engine_kwargs.update({
+            "poolclass": TimedQueuePool,
+            "pool_size": 5,
+            "max_overflow": 10,
+            "pool_pre_ping": True,  # Verify connections before using
+            "pool_recycle": 3600,   # Recycle connections after 1 hour
+        })
+    else:
+        # SQLite-specific settings for local development
+        connect_args = {"check_same_thread": False}
+
+    new_engine = create_engine(
+        url,
+        connect_args=connect_args,
+        **engine_kwargs
+    )
+    if new_engine.dialect.name == "sqlite":
+        if settings.SQLITE_TUNED:
+            install_pragmas(new_engine)
+        install_sqlite_functions(new_engine)
+    if settings.SQL_PROFILING_ENABLED:
+        from app import query_profiler
+        query_profiler.install(new_engine)
+    if settings.TRACING_ENABLED:
+        tracing.install(new_engine)
+    return new_engine
+
+
+engine = _create_engine(settings.DATABASE_URL)
+register_pool_gauges(engine.pool)
+
+# Hot small writes (view counts) are queued and applied in batches by one writer connection
+_batch_writes = settings.SQLITE_WRITER_ENABLED if engine.dialect.name == "sqlite" else settings.VIEW_COUNT_BATCHING
+db_writer = BatchWriter(engine) if _batch_writes else None
+
+# Optional read replicas (DATABASE_READ_URLS); None means all traffic uses the primary
+_read_urls = [url.strip() for url in settings.DATABASE_READ_URLS.split(",") if url.strip()]
+if _read_urls:
+    from app.replicas import ReplicaPool, WriteTracker
+    read_replicas = ReplicaPool(_read_urls, _create_engine, settings.READ_REPLICA_CHECK_INTERVAL)
+    recent_writers = WriteTracker(settings.READ_YOUR_WRITES_SECONDS)
 else:
-    # SQLite-specific settings for local development
-    connect_args = {"check_same_thread": False}
+    read_replicas = recent_writers = None
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_session_wrote(session: Session, flush_context) -> None:
+    session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_statement_wrote(orm_execute_state) -> None:
+    # insert()/update()/delete() run through session.exec/execute do not flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["has_writes"] = True
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args=connect_args,
-    **engine_kwargs
-)
 
 def create_db_and_tables():
     """Create all database tables."""
     SQLModel.metadata.create_all(engine)
+    create_search_indexes()
+    if not read_replicas:
+        return
+    from app.replicas import start_sqlite_replication
+    if start_sqlite_replication(
+        settings.DATABASE_URL, [r.url for r in read_replicas.replicas], settings.SQLITE_REPLICA_SYNC_INTERVAL
+    ):
+        print(f"Copying the SQLite primary to {len(read_replicas.replicas)} replica file(s) every "
+              f"{settings.SQLITE_REPLICA_SYNC_INTERVAL}s")
+
+
+def create_search_indexes():
+    """Create pg_trgm GIN indexes used by fuzzy search (PostgreSQL only)."""
+    if engine.dialect.name != "postgresql":
+        return
 
-def get_session():
+    statements = [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX IF NOT EXISTS ix_note_title_trgm ON note USING gin (title gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_note_topic_trgm ON note USING gin (topic gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_note_content_trgm ON note USING gin (content gin_trgm_ops)",
+    ]
+    try:
+        with engine.begin() as conn:
+            for statement in statements:
+                conn.execute(text(statement))
+    except Exception as e:
+        print(f"Could not create trigram search indexes: {e}")
+
+def get_session(request: Request):
     """Get database session."""
     with Session(engine) as session:
+        yield session
+        # Pin the client to the primary for a while so it reads its own writes
+        if read_replicas and session.info.get("has_writes"):
+            recent_writers.record(client_key(request))
+
+
+def get_read_engine(request: Request) -> Engine:
+    """A healthy replica for read-only work, or the primary after the client's own recent write."""
+    if not read_replicas or recent_writers.is_pinned(client_key(request)):
+        return engine
+    return read_replicas.choose() or engine
+
+
+def get_read_session(request: Request):
+    """Get database session for read-only endpoints (routed to a replica when configured)."""
+    with Session(get_read_engine(request)) as session:
         yield session
\ No newline at end of file
@@ -1,10 +1,19 @@
 import os
-import resend
+from functools import lru_cache
 from typing import Optional
 
-# Configure Resend API
-resend.api_key = os.getenv("RESEND_API_KEY")
+from app.tracing import traced, SPAN_KIND_CLIENT
 
+
+@lru_cache(maxsize=1)
+def get_resend():
+    """Import and configure the Resend client on first use (keeps it out of cold start)."""
+    import resend
+    resend.api_key = os.getenv("RESEND_API_KEY")
+    return resend
+
+
+@traced("email.send_verification", kind=SPAN_KIND_CLIENT)
 def send_verification_email(to_email: str, verification_token: str) -> bool:
     """Send verification email using Resend API."""
     try:
@@ -70,7 +79,7 @@ def send_verification_email(to_email: str, verification_token: str) -> bool:
             """
         }
         
-        email = resend.Emails.send(params)
+        email = get_resend().Emails.send(params)
         print(f"Verification email sent successfully to {to_email}. Email ID: {email.get('id')}")
         return True
         
@@ -79,6 +88,7 @@ def send_verification_email(to_email: str, verification_token: str) -> bool:
         return False
 
 
+@traced("email.send_password_reset", kind=SPAN_KIND_CLIENT)
 def send_password_reset_email(to_email: str, reset_token: str) -> bool:
     """Send password reset email using Resend API."""
     try:
@@ -148,7 +158,7 @@ def send_password_reset_email(to_email: str, reset_token: str) -> bool:
             """
         }
         
-        email = resend.Emails.send(params)
+        email = get_resend().Emails.send(params)
         print(f"Password reset email sent successfully to {to_email}. Email ID: {email.get('id')}")
         return True
         
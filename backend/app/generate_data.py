@@ -0,0 +1,309 @@
+"""
+Synthetic data generator for load testing.
+
+Builds realistic datasets (users, subjects, notes with Zipf-distributed view
+counts, English/Sinhala/Tamil content and fake upload files) at production scale.
+Rows go in through COPY on PostgreSQL and executemany on SQLite.
+
+Run from the backend directory:
+    python -m app.generate_data --users 10000 --subjects 60 --notes 1000000 --files 500
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+import csv
+import io
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+from sqlalchemy.engine import Engine
+from sqlmodel import SQLModel
+
+from app.storage import StorageBackend
+
+# Password shared by every generated user
+GENERATED_PASSWORD = "loadtest123"
+
+BASE_SUBJECTS = [
+    ("Mathematics", "OL"), ("Science", "OL"), ("English", "OL"), ("Sinhala", "OL"),
+    ("Tamil", "OL"), ("History", "OL"), ("Geography", "OL"), ("Buddhism", "OL"),
+    ("Commerce", "OL"), ("ICT", "OL"), ("Health Science", "OL"), ("Civic Education", "OL"),
+    ("Combined Mathematics", "AL"), ("Physics", "AL"), ("Chemistry", "AL"), ("Biology", "AL"),
+    ("Economics", "AL"), ("Accounting", "AL"), ("Business Studies", "AL"), ("Agriculture", "AL"),
+    ("Political Science", "AL"), ("Logic", "AL"), ("Engineering Technology", "AL"), ("Geography", "AL"),
+]
+MEDIUMS = ["Sinhala Medium", "Tamil Medium", "English Medium"]
+
+TOPICS = [
+    "Algebra", "Geometry", "Calculus", "Mechanics", "Waves", "Electricity", "Organic",
+    "Inorganic", "Genetics", "Ecology", "Grammar", "Literature", "Essay Writing",
+    "Past Papers", "Model Papers", "Revision", "Theory", "Practicals",
+]
+
+# Small per-language vocabularies used to assemble note text
+VOCABULARY = {
+    "en": (
+        "the equation force energy cell reaction theory exam answer question formula "
+        "velocity acceleration molecule atom gene market demand supply account balance "
+        "example solution method derive prove graph function integral derivative matrix "
+        "photosynthesis enzyme organism current voltage resistance wave frequency revision "
+        "important remember note chapter unit model paper past marks structure essay"
+    ).split(),
+    "si": (
+        "සමීකරණය බලය ශක්තිය සෛලය ප්‍රතික්‍රියාව න්‍යාය විභාගය පිළිතුර ප්‍රශ්නය සූත්‍රය "
+        "ප්‍රවේගය ත්වරණය අණුව පරමාණුව ජානය වෙළඳපොළ ඉල්ලුම සැපයුම උදාහරණය විසඳුම "
+        "ක්‍රමය ප්‍රස්තාරය ශ්‍රිතය පාඩම ඒකකය ආදර්ශ ප්‍රශ්න පත්‍රය ලකුණු රචනය වැදගත්"
+    ).split(),
+    "ta": (
+        "சமன்பாடு விசை ஆற்றல் கலம் தாக்கம் கோட்பாடு பரீட்சை விடை வினா சூத்திரம் "
+        "வேகம் ஆர்முடுகல் மூலக்கூறு அணு பரம்பரையலகு சந்தை கேள்வி நிரம்பல் உதாரணம் தீர்வு "
+        "முறை வரைபு சார்பு பாடம் அலகு மாதிரி வினாத்தாள் புள்ளிகள் கட்டுரை முக்கியம்"
+    ).split(),
+}
+LANGUAGE_WEIGHTS = {"si": 0.5, "en": 0.3, "ta": 0.2}
+SENTENCE_POOL_SIZE = 2000
+
+# Minimal valid file bodies; random padding makes sizes realistic
+FAKE_PDF = b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n2 0 obj<</Type/Pages/Kids[]/Count 0>>endobj\ntrailer<</Root 1 0 R>>\n%%EOF\n"
+FAKE_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)
+
+USER_COLUMNS = ["full_name", "email", "hashed_password", "is_verified", "is_admin", "verification_token", "created_at"]
+SUBJECT_COLUMNS = ["name", "exam_type", "description", "is_active", "created_at"]
+NOTE_COLUMNS = [
+    "title", "content", "subject_id", "topic", "author_id", "file_url",
+    "is_published", "view_count", "created_at", "updated_at",
+]
+
+
+def _chunks(rows: Iterable[tuple], size: int) -> Iterator[List[tuple]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def bulk_insert(engine: Engine, table: str, columns: Sequence[str], rows: Iterable[tuple], batch_size: int) -> int:
+    """Insert rows with COPY (PostgreSQL) or executemany (SQLite), committing per batch."""
+    count = 0
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        if engine.dialect.name == "postgresql":
+            copy_sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+            for chunk in _chunks(rows, batch_size):
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(chunk)
+                buffer.seek(0)
+                cursor.copy_expert(copy_sql, buffer)
+                raw.commit()
+                count += len(chunk)
+        else:
+            # Durability doesn't matter for throwaway load-test data
+            cursor.execute("PRAGMA synchronous = OFF")
+            placeholders = ", ".join("?" for _ in columns)
+            insert_sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+            for chunk in _chunks(rows, batch_size):
+                cursor.executemany(insert_sql, chunk)
+                raw.commit()
+                count += len(chunk)
+        cursor.close()
+    finally:
+        raw.close()
+    return count
+
+
+def _fetch_ids(engine: Engine, table: str) -> List[int]:
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute(f"SELECT id FROM {table}")
+        ids = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+        return ids
+    finally:
+        raw.close()
+
+
+class DataGenerator:
+    """Generates reproducible synthetic rows from a seed."""
+
+    def __init__(self, seed: int = 42, now: Optional[datetime] = None):
+        self.rng = random.Random(seed)
+        self.run_id = uuid.UUID(int=self.rng.getrandbits(128)).hex[:8]
+        self.now = now or datetime.utcnow()
+        self._languages = list(LANGUAGE_WEIGHTS)
+        self._language_weights = list(LANGUAGE_WEIGHTS.values())
+        # Notes are assembled from pre-built sentences, which is much faster
+        # than building every sentence word by word
+        self._sentences = {
+            language: [self._sentence(language) for _ in range(SENTENCE_POOL_SIZE)]
+            for language in VOCABULARY
+        }
+
+    def _timestamp(self, max_days: int = 730) -> datetime:
+        return self.now - timedelta(seconds=self.rng.randint(0, max_days * 86400))
+
+    def _sentence(self, language: str) -> str:
+        sentence = " ".join(self.rng.choices(VOCABULARY[language], k=self.rng.randint(6, 16)))
+        return sentence[0].upper() + sentence[1:] + "."
+
+    def _text(self, language: str, sentences: int) -> str:
+        return " ".join(self.rng.choices(self._sentences[language], k=sentences))
+
+    def users(self, count: int, hashed_password: str) -> Iterator[tuple]:
+        for i in range(count):
+            created = self._timestamp()
+            yield (
+                f"Student {self.run_id}-{i}",
+                f"student-{self.run_id}-{i}@loadtest.slnotes.lk",
+                hashed_password,
+                self.rng.random() < 0.9,
+                False,
+                "",
+                created,
+            )
+
+    def subjects(self, count: int) -> Iterator[tuple]:
+        for i in range(count):
+            name, exam_type = BASE_SUBJECTS[i % len(BASE_SUBJECTS)]
+            round_ = i // len(BASE_SUBJECTS)
+            if round_:
+                name = f"{name} ({MEDIUMS[(round_ - 1) % len(MEDIUMS)]})"
+                if round_ > len(MEDIUMS):
+                    name = f"{name} {round_}"
+            yield (name, exam_type, f"{exam_type} {name} study notes", True, self._timestamp())
+
+    def view_counts(self, count: int, max_views: int = 100000, exponent: float = 1.1) -> List[int]:
+        """Zipf-distributed view counts: the note at popularity rank r gets ~max_views / r**s."""
+        counts = [int(max_views / (rank ** exponent)) for rank in range(1, count + 1)]
+        self.rng.shuffle(counts)
+        return counts
+
+    def notes(
+        self,
+        count: int,
+        subject_ids: Sequence[int],
+        author_ids: Sequence[int],
+        file_urls: Sequence[str] = (),
+    ) -> Iterator[tuple]:
+        views = self.view_counts(count)
+        file_slots = set(self.rng.sample(range(count), min(len(file_urls), count)))
+        file_iter = iter(file_urls)
+        for i in range(count):
+            language = self.rng.choices(self._languages, self._language_weights)[0]
+            created = self._timestamp()
+            updated = created + timedelta(seconds=self.rng.randint(0, 30 * 86400))
+            yield (
+                self._sentence(language).rstrip("."),
+                self._text(language, self.rng.randint(4, 36)),
+                self.rng.choice(subject_ids),
+                self.rng.choice(TOPICS) if self.rng.random() < 0.8 else None,
+                self.rng.choice(author_ids),
+                next(file_iter) if i in file_slots else None,
+                self.rng.random() < 0.95,
+                views[i],
+                created,
+                min(updated, self.now),
+            )
+
+    def files(self, count: int, storage: StorageBackend) -> List[str]:
+        """Store fake PDF/PNG uploads and return their URLs."""
+        urls = []
+        for i in range(count):
+            is_pdf = self.rng.random() < 0.7
+            body = FAKE_PDF if is_pdf else FAKE_PNG
+            padding = self.rng.randbytes(self.rng.randint(10, 500) * 1024)
+            filename = f"loadtest_{self.run_id}_{i}{'.pdf' if is_pdf else '.png'}"
+            # Padding after the EOF marker / IEND chunk keeps the files readable
+            storage.save(filename, body + padding)
+            urls.append(f"/uploads/{filename}")
+        return urls
+
+
+def generate(
+    engine: Engine,
+    users: int,
+    subjects: int,
+    notes: int,
+    files: int = 0,
+    seed: int = 42,
+    batch_size: int = 10000,
+    storage: Optional[StorageBackend] = None,
+    verbose: bool = True,
+) -> dict:
+    """Create tables if needed and insert a synthetic dataset. Returns row counts and timings."""
+    from app.auth_utils import hash_password
+    import app.models  # noqa: F401  (registers tables)
+
+    SQLModel.metadata.create_all(engine)
+    generator = DataGenerator(seed)
+    stats = {}
+
+    def timed(label: str, table: str, columns, rows):
+        started = time.perf_counter()
+        inserted = bulk_insert(engine, table, columns, rows, batch_size)
+        elapsed = time.perf_counter() - started
+        stats[label] = {"rows": inserted, "seconds": round(elapsed, 2)}
+        if verbose:
+            rate = inserted / elapsed if elapsed else 0
+            print(f"  + {inserted:,} {label} in {elapsed:.1f}s ({rate:,.0f} rows/s)")
+
+    # bcrypt is slow, so every generated user shares one hash
+    hashed_password = hash_password(GENERATED_PASSWORD)
+    timed("users", '"user"', USER_COLUMNS, generator.users(users, hashed_password))
+    timed("subjects", "subject", SUBJECT_COLUMNS, generator.subjects(subjects))
+
+    subject_ids = _fetch_ids(engine, "subject")
+    author_ids = _fetch_ids(engine, '"user"')
+    if notes and (not subject_ids or not author_ids):
+        raise ValueError("Notes need at least one subject and one user")
+
+    file_urls = generator.files(files, storage) if files and storage else []
+    if file_urls and verbose:
+        print(f"  + {len(file_urls):,} fake upload files in {storage.name} storage")
+
+    timed("notes", "note", NOTE_COLUMNS, generator.notes(notes, subject_ids, author_ids, file_urls))
+    return stats
+
+
+def main():
+    from app.database import engine
+    from app.storage import get_storage
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset for load testing")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--subjects", type=int, default=len(BASE_SUBJECTS))
+    parser.add_argument("--notes", type=int, default=10000)
+    parser.add_argument("--files", type=int, default=0, help="Fake upload files attached to random notes")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f"\n🏭 Generating data into {engine.url.render_as_string(hide_password=True)}...\n")
+    generate(
+        engine,
+        users=args.users,
+        subjects=args.subjects,
+        notes=args.notes,
+        files=args.files,
+        seed=args.seed,
+        batch_size=args.batch_size,
+        storage=get_storage(),
+    )
+    print(f"\n✅ Done! Generated users log in with password '{GENERATED_PASSWORD}'\n")
+
+
+if __name__ == "__main__":
+    main()
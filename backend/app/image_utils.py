@@ -0,0 +1,258 @@
+"""
+Responsive image variants for uploaded images.
+
+After an image is uploaded, a worker pool re-encodes it as AVIF and WebP at
+each of IMAGE_VARIANT_WIDTHS (never upscaling), with the EXIF orientation
+applied and all metadata dropped. Variants are stored next to the original
+(see app.storage):
+
+    variants/<name>/<width>.<format>
+    variants/<name>/manifest.json   (written last, once all variants exist)
+
+GET /uploads/{filename} then serves the smallest variant that the client
+accepts (Accept: image/avif, image/webp) and that is at least as wide as its
+Width, or Viewport-Width x DPR, client hint. Clients without hints get the
+largest variant; clients accepting neither format get the original.
+
+Needs the optional Pillow package (AVIF needs Pillow 11.3+ or the
+pillow-avif-plugin); without it uploads are served as-is.
+
+Create variants for files uploaded before this was enabled, from the backend directory:
+    python -m app.image_utils
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Pillow is imported on first use (see _load_pillow), not when the server starts
+Image = ImageOps = features = None
+
+from app.cache_utils import TTLCache
+from app.config import get_settings
+from app.storage import get_storage
+
+settings = get_settings()
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
+VARIANTS_DIR = "variants"
+MANIFEST = "manifest.json"
+MEDIA_TYPES = {"avif": "image/avif", "webp": "image/webp"}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_manifests = TTLCache(ttl=30, max_entries=4096)
+_executor_lock = threading.Lock()
+_pillow_checked = False
+
+
+def _load_pillow() -> bool:
+    """Import Pillow if it is installed; returns whether it is available."""
+    global Image, ImageOps, features, _pillow_checked
+    if not _pillow_checked:
+        try:
+            from PIL import Image, ImageOps, features
+        except ImportError:
+            pass
+        _pillow_checked = True
+    return Image is not None
+
+
+def available_formats() -> List[str]:
+    """Configured variant formats, in preference order, that the installed Pillow can encode."""
+    if not _load_pillow():
+        return []
+    supported = {"webp": features.check("webp"), "avif": _avif_supported()}
+    return [f.strip() for f in settings.IMAGE_VARIANT_FORMATS.split(",") if supported.get(f.strip())]
+
+
+def _avif_supported() -> bool:
+    try:
+        if features.check("avif"):
+            return True
+    except ValueError:
+        # Pillow versions without built-in AVIF support
+        pass
+    try:
+        import pillow_avif  # noqa: F401  (registers the AVIF plugin)
+    except ImportError:
+        return False
+    return True
+
+
+def variant_widths() -> List[int]:
+    return sorted(int(w) for w in settings.IMAGE_VARIANT_WIDTHS.split(",") if w.strip())
+
+
+def variants_prefix(name: str) -> str:
+    """Storage key prefix of an upload's variants."""
+    return f"{VARIANTS_DIR}/{name}/"
+
+
+def create_variants(name: str) -> List[Dict]:
+    """Encode every variant of an uploaded image and store its manifest; returns the manifest entries."""
+    storage = get_storage()
+    formats = available_formats()
+    prefix = variants_prefix(name)
+    with storage.local_copy(name) as original, tempfile.TemporaryDirectory() as workdir:
+        with Image.open(original) as image:
+            if getattr(image, "is_animated", False):
+                # Animated GIF/WebP would lose their frames
+                return []
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+
+            widths = [w for w in variant_widths() if w < image.width] + [min(image.width, variant_widths()[-1])]
+            entries = []
+            for width in sorted(set(widths)):
+                height = max(1, round(image.height * width / image.width))
+                resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+                for fmt in formats:
+                    path = Path(workdir) / f"{width}.{fmt}"
+                    # No exif= argument: metadata is not carried over
+                    resized.save(path, format=fmt.upper(), quality=settings.IMAGE_VARIANT_QUALITY)
+                    entries.append({"format": fmt, "width": width, "size": path.stat().st_size})
+                    storage.save_file(prefix + path.name, path, move=True)
+        original_size = original.stat().st_size
+
+    manifest = {"original_size": original_size, "variants": entries}
+    storage.save(prefix + MANIFEST, json.dumps(manifest).encode("utf-8"))
+    _manifests.delete(name)
+    return entries
+
+
+def _create_variants_logged(name: str) -> None:
+    try:
+        create_variants(name)
+    except Exception as e:
+        print(f"Image variants for {name} failed: {e}")
+
+
+def schedule_variants(name: str) -> Optional[Future]:
+    """Queue variant creation for an uploaded image on the worker pool."""
+    global _executor
+    if not settings.IMAGE_VARIANTS_ENABLED or os.path.splitext(name)[1].lower() not in IMAGE_EXTENSIONS:
+        return None
+    if not available_formats():
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.IMAGE_WORKERS, thread_name_prefix="image-variants")
+        return _executor.submit(_create_variants_logged, name)
+
+
+def shutdown_workers() -> None:
+    """Stop the worker pool, dropping images still waiting (the backfill CLI picks them up)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def delete_variants(name: str) -> None:
+    storage = get_storage()
+    for stored in list(storage.list(variants_prefix(name))):
+        storage.delete(stored.key)
+    _manifests.delete(name)
+
+
+def _load_manifest(name: str) -> Optional[Dict]:
+    # Cached (including "no manifest yet") so remote storage is not asked on every download
+    manifest = _manifests.get(name)
+    if manifest is None:
+        try:
+            manifest = json.loads(get_storage().read(variants_prefix(name) + MANIFEST))
+        except (OSError, ValueError):
+            manifest = {}
+        _manifests.set(name, manifest)
+    return manifest or None
+
+
+def _accepted_formats(accept: str) -> List[str]:
+    """Variant formats the Accept header allows (q > 0)."""
+    accepted = set()
+    for part in accept.split(","):
+        media_type, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                q = _float(param[2:]) or 0.0
+        if q > 0:
+            accepted.add(media_type.lower())
+    return [fmt for fmt, media_type in MEDIA_TYPES.items() if media_type in accepted]
+
+
+def _float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def requested_width(headers) -> Optional[int]:
+    """Target width in pixels from the Width or Viewport-Width and DPR client hints."""
+    width = _float(headers.get("width") or headers.get("sec-ch-width"))
+    if width is None:
+        viewport = _float(headers.get("viewport-width") or headers.get("sec-ch-viewport-width"))
+        if viewport is None:
+            return None
+        width = viewport * (_float(headers.get("dpr") or headers.get("sec-ch-dpr")) or 1.0)
+    return int(width + 0.5)
+
+
+def choose_variant(name: str, accept: str, width: Optional[int]) -> Optional[str]:
+    """Storage key of the best variant of an image for the client, or None to serve the original."""
+    manifest = _load_manifest(name)
+    if not manifest:
+        return None
+    accepted = _accepted_formats(accept)
+    for fmt in available_formats() + accepted:
+        candidates = sorted(
+            (v for v in manifest["variants"] if v["format"] == fmt and fmt in accepted), key=lambda v: v["width"]
+        )
+        if candidates:
+            break
+    else:
+        return None
+
+    chosen = candidates[-1]
+    if width is not None:
+        chosen = next((v for v in candidates if v["width"] >= width), candidates[-1])
+    if chosen["size"] >= manifest["original_size"]:
+        return None
+    return f"{variants_prefix(name)}{chosen['width']}.{fmt}"
+
+
+def main():
+    if not available_formats():
+        print("✗ Pillow with WebP/AVIF support is required (pip install Pillow)")
+        sys.exit(1)
+
+    names = [
+        stored.key for stored in get_storage().list()
+        if "/" not in stored.key
+        and os.path.splitext(stored.key)[1].lower() in IMAGE_EXTENSIONS
+        and _load_manifest(stored.key) is None
+    ]
+    print(f"\n🖼  Creating variants ({', '.join(available_formats())}) for {len(names)} images...\n")
+
+    created = failed = 0
+    with ThreadPoolExecutor(max_workers=settings.IMAGE_WORKERS) as pool:
+        for name, future in [(name, pool.submit(create_variants, name)) for name in names]:
+            try:
+                future.result()
+                created += 1
+            except Exception as e:
+                failed += 1
+                print(f"  ✗ {name}: {e}")
+
+    print(f"✅ Created variants for {created} images ({failed} failed)\n")
+
+
+if __name__ == "__main__":
+    main()
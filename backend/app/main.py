@@ -1,29 +1,45 @@
+from app.startup import timer as startup_timer, FirstResponseMiddleware, warm_up_lazy_modules
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 import os
-from app.database import create_db_and_tables
+from sqlmodel import Session
+from app.database import create_db_and_tables, db_writer, engine
 from app.config import get_settings
-from app.routers import auth, subjects, notes, search, uploads, admin
+from app.routers import auth, subjects, notes, search, uploads, upload_sessions, admin, feed, sync
+from app import image_utils
 
 settings = get_settings()
+startup_timer.mark("imports")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan - runs on startup and shutdown."""
     # Startup
-    create_db_and_tables()
+    with startup_timer.phase("create_tables"):
+        create_db_and_tables()
     
     # Ensure upload directory exists
-    upload_dir = os.path.join(os.path.dirname(__file__), "uploads")
-    os.makedirs(upload_dir, exist_ok=True)
+    with startup_timer.phase("upload_dir"):
+        upload_dir = os.path.join(os.path.dirname(__file__), "uploads")
+        os.makedirs(upload_dir, exist_ok=True)
+    
+    # Remove resumable uploads abandoned while the server was down
+    with startup_timer.phase("upload_cleanup"):
+        with Session(engine) as session:
+            upload_sessions.cleanup_expired_sessions(session)
+    
+    print(f"🚀 Startup: {startup_timer.summary()}")
     
     yield
     
-    # Shutdown (cleanup if needed)
-    pass
+    # Shutdown: apply view counts still queued for the batch writer
+    if db_writer is not None:
+        db_writer.stop()
+    image_utils.shutdown_workers()
 
 
 app = FastAPI(
@@ -33,6 +49,13 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Log time-to-first-response once after boot, then warm up lazily imported modules
+app.add_middleware(
+    FirstResponseMiddleware,
+    target_ms=settings.STARTUP_TARGET_MS,
+    on_first_response=warm_up_lazy_modules if settings.STARTUP_WARM_UP else None,
+)
+
 # CORS Configuration
 app.add_middleware(
     CORSMiddleware,
@@ -42,10 +65,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static files for uploads
-upload_dir = os.path.join(os.path.dirname(__file__), "uploads")
-os.makedirs(upload_dir, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=upload_dir), name="uploads")
+# Negotiated gzip/brotli/zstd compression (inside the metrics middleware, so sizes are on-the-wire)
+# Middleware modules are imported only when enabled, to keep them off the cold-start path
+if settings.COMPRESSION_ENABLED:
+    from app.compression import CompressionMiddleware
+    app.add_middleware(CompressionMiddleware)
+
+# Per-route request metrics (exposed on /metrics)
+if settings.METRICS_ENABLED:
+    from app.metrics import MetricsMiddleware
+    app.add_middleware(MetricsMiddleware)
+
+# Per-request query count and DB time (Server-Timing header)
+if settings.SQL_PROFILING_ENABLED:
+    from app.query_profiler import QueryProfilingMiddleware
+    app.add_middleware(QueryProfilingMiddleware)
+
+# Request tracing (W3C traceparent, sampled spans exported to TRACE_EXPORT_PATH)
+if settings.TRACING_ENABLED:
+    from app.tracing import TracingMiddleware
+    app.add_middleware(TracingMiddleware)
+
+# Uploaded images are negotiated to their best variant; must come before the static mount
+app.include_router(uploads.download_router)
+
+# Mount static files for uploads (other storage backends are served by the route above)
+if settings.STORAGE_BACKEND == "local":
+    upload_dir = os.path.join(os.path.dirname(__file__), "uploads")
+    os.makedirs(upload_dir, exist_ok=True)
+    app.mount("/uploads", StaticFiles(directory=upload_dir), name="uploads")
 
 # Include routers
 app.include_router(auth.router)
@@ -53,7 +101,10 @@ app.include_router(subjects.router)
 app.include_router(notes.router)
 app.include_router(search.router)
 app.include_router(uploads.router)
+app.include_router(upload_sessions.router)
 app.include_router(admin.router)
+app.include_router(feed.router)
+app.include_router(sync.router)
 
 
 @app.get("/", tags=["Health"])
@@ -69,4 +120,12 @@ def read_root():
 @app.get("/health", tags=["Health"])
 def health_check():
     """Health check endpoint."""
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+def metrics():
+    """Prometheus metrics endpoint."""
+    from app.metrics import registry
+
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -3,6 +3,8 @@ from typing import Optional
 from datetime import datetime
 import uuid
 
+from app.content_compression import CompressedText
+
 
 class User(SQLModel, table=True):
     """User model for authentication."""
@@ -36,12 +38,48 @@ class Note(SQLModel, table=True):
 
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str = Field(index=True)
-    content: str
+    content: str = Field(sa_type=CompressedText)  # Stored compressed above CONTENT_COMPRESSION_MIN_SIZE
     subject_id: int = Field(foreign_key="subject.id")
     topic: Optional[str] = None
     author_id: int = Field(foreign_key="user.id")
-    file_url: Optional[str] = None
+    file_url: Optional[str] = Field(default=None, index=True)  # Indexed for upload garbage collection
     is_published: bool = Field(default=True)
     view_count: int = Field(default=0)
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
\ No newline at end of file
+    updated_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
+class ChangeLog(SQLModel, table=True):
+    """Change feed of note and subject writes, used for delta sync."""
+    __table_args__ = {"extend_existing": True}
+
+    id: Optional[int] = Field(default=None, primary_key=True)  # Monotonic change token
+    entity_type: str = Field(index=True)  # "note" or "subject"
+    entity_id: int
+    operation: str  # "upsert" or "delete"
+    changed_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class CompressionDictionary(SQLModel, table=True):
+    """Trained zstd dictionary for note content compression (the newest one is used for writes)."""
+    __table_args__ = {"extend_existing": True}
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    data: bytes
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class UploadSession(SQLModel, table=True):
+    """In-progress resumable upload; bytes are staged outside the public uploads directory."""
+    __table_args__ = {"extend_existing": True}
+
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex, primary_key=True)
+    user_id: int = Field(foreign_key="user.id")
+    note_id: Optional[int] = None  # Note to attach the file to once finalized
+    filename: str
+    file_ext: str
+    length: int  # Declared total size in bytes
+    offset: int = Field(default=0)  # Bytes received so far
+    sha256: str  # Expected checksum, verified on finalize
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime = Field(index=True)
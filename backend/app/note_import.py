@@ -0,0 +1,279 @@
+"""
+Bulk note import from JSONL or CSV.
+
+Each row needs title, content and either subject_id or subject (name, with an
+optional exam_type to disambiguate). Optional columns: topic, is_published,
+file_url, and file (name of an accompanying attachment).
+
+Run from the backend directory:
+    python -m app.note_import notes.jsonl --author admin@slnotes.lk [--files-dir attachments/]
+"""
+import argparse
+import csv
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, TextIO, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlmodel import Session, select
+
+from app.models import Note, Subject
+from app.schemas import NoteCreate, NoteImportResponse, ImportRowError
+from app.sync_utils import record_changes
+
+# Stop collecting row errors after this many (they are still counted)
+MAX_REPORTED_ERRORS = 1000
+
+# Loads an attachment's bytes and extension on demand
+AttachmentLoader = Callable[[], Tuple[bytes, str]]
+
+
+def iter_rows(stream: TextIO, fmt: str) -> Iterator[Tuple[int, object]]:
+    """
+    Yield (row_number, row) pairs from a JSONL or CSV stream, one line at a time.
+    Unparseable JSON lines are yielded as the exception so they can be reported.
+    """
+    if fmt == "csv":
+        for row_number, row in enumerate(csv.DictReader(stream), start=1):
+            # Treat empty CSV cells as missing values
+            yield row_number, {k: v for k, v in row.items() if v not in ("", None)}
+        return
+
+    for row_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield row_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, e
+
+
+def detect_format(filename: str) -> str:
+    """Guess the import format from a file name."""
+    return "csv" if filename.lower().endswith(".csv") else "jsonl"
+
+
+class SubjectResolver:
+    """Resolves subject names to ids from a lookup map built with one query."""
+
+    def __init__(self, session: Session):
+        self._by_id = set()
+        self._by_name_and_type: Dict[Tuple[str, str], int] = {}
+        self._by_name: Dict[str, Optional[int]] = {}
+        for subject_id, name, exam_type in session.exec(
+            select(Subject.id, Subject.name, Subject.exam_type)
+        ).all():
+            key = name.strip().lower()
+            self._by_id.add(subject_id)
+            self._by_name_and_type[(key, exam_type)] = subject_id
+            # Names shared by O/L and A/L subjects need an exam_type
+            self._by_name[key] = None if key in self._by_name else subject_id
+
+    def resolve(self, row: dict) -> int:
+        if row.get("subject_id") not in (None, ""):
+            subject_id = int(row["subject_id"])
+            if subject_id not in self._by_id:
+                raise ValueError(f"Subject {subject_id} not found")
+            return subject_id
+
+        name = str(row.get("subject") or "").strip().lower()
+        if not name:
+            raise ValueError("Missing subject or subject_id")
+
+        exam_type = row.get("exam_type")
+        if exam_type:
+            subject_id = self._by_name_and_type.get((name, exam_type))
+        else:
+            if self._by_name.get(name, 0) is None:
+                raise ValueError(f"Subject '{row['subject']}' is ambiguous, add exam_type")
+            subject_id = self._by_name.get(name)
+
+        if subject_id is None:
+            raise ValueError(f"Subject '{row['subject']}' not found")
+        return subject_id
+
+
+def _insert_batch(session: Session, batch: List[Tuple[int, dict]], errors: List[ImportRowError]) -> int:
+    """
+    Insert a batch with one multi-row statement. If the batch fails, retry
+    row by row inside savepoints so only the offending rows are rejected.
+    """
+    try:
+        with session.begin_nested():
+            note_ids = session.scalars(
+                insert(Note).returning(Note.id), [values for _, values in batch]
+            ).all()
+    except Exception:
+        note_ids = []
+        for row_number, values in batch:
+            try:
+                with session.begin_nested():
+                    note_ids.append(session.scalars(insert(Note).returning(Note.id), [values]).one())
+            except Exception as e:
+                errors.append(ImportRowError(row=row_number, error=str(getattr(e, "orig", e))))
+
+    record_changes(session, "note", note_ids, "upsert")
+    return len(note_ids)
+
+
+def import_notes(
+    session: Session,
+    rows: Iterable[Tuple[int, object]],
+    author_id: int,
+    batch_size: int = 500,
+    attachments: Optional[Mapping[str, AttachmentLoader]] = None,
+    save_attachment: Optional[Callable[[bytes, str], str]] = None,
+    delete_attachment: Optional[Callable[[str], None]] = None,
+) -> NoteImportResponse:
+    """
+    Validate rows against NoteCreate and insert them in batches of batch_size.
+    Everything runs in one transaction that is committed at the end; invalid
+    rows are reported and skipped without aborting the import.
+    Attachments are saved once their row is valid and deleted again with
+    delete_attachment if the row's insert, or the whole import, fails.
+    """
+    resolver = SubjectResolver(session)
+    attachments = attachments or {}
+    imported = failed = 0
+    errors: List[ImportRowError] = []
+    batch: List[Tuple[int, dict]] = []
+    # Attachment names saved for the pending batch, and for the whole import
+    batch_files: Dict[int, str] = {}
+    saved_files: List[str] = []
+
+    def fail(row_number: int, error: str):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append(ImportRowError(row=row_number, error=error))
+
+    def discard(names: Iterable[str]):
+        if delete_attachment is not None:
+            for name in names:
+                delete_attachment(name)
+
+    def flush_batch():
+        nonlocal imported
+        batch_errors: List[ImportRowError] = []
+        imported += _insert_batch(session, batch, batch_errors)
+        for error in batch_errors:
+            fail(error.row, error.error)
+        discard(batch_files.pop(error.row) for error in batch_errors if error.row in batch_files)
+        batch.clear()
+        batch_files.clear()
+
+    try:
+        for row_number, row in rows:
+            if isinstance(row, Exception):
+                fail(row_number, f"Invalid JSON: {row}")
+                continue
+            if not isinstance(row, dict):
+                fail(row_number, "Row must be an object")
+                continue
+
+            try:
+                fields = {k: row[k] for k in ("title", "content", "topic", "file_url", "is_published") if k in row}
+                fields["subject_id"] = resolver.resolve(row)
+                note = NoteCreate(**fields)
+
+                if row.get("file"):
+                    loader = attachments.get(Path(str(row["file"])).name)
+                    if loader is None or save_attachment is None:
+                        raise ValueError(f"Attachment '{row['file']}' was not provided")
+                    content, file_ext = loader()
+                    filename = save_attachment(content, file_ext)
+                    batch_files[row_number] = filename
+                    saved_files.append(filename)
+                    note.file_url = f"/uploads/{filename}"
+            except ValidationError as e:
+                fail(row_number, "; ".join(
+                    f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+                ))
+                continue
+            except (ValueError, TypeError) as e:
+                fail(row_number, str(e))
+                continue
+
+            now = datetime.utcnow()
+            batch.append((row_number, {
+                **note.model_dump(),
+                "author_id": author_id,
+                "view_count": 0,
+                "created_at": now,
+                "updated_at": now,
+            }))
+
+            if len(batch) >= batch_size:
+                flush_batch()
+
+        if batch:
+            flush_batch()
+
+        session.commit()
+    except BaseException:
+        # Nothing was committed, so none of the saved attachments are referenced
+        discard(saved_files)
+        raise
+    errors.sort(key=lambda e: e.row)
+    return NoteImportResponse(imported=imported, failed=failed, errors=errors)
+
+
+def _directory_attachments(files_dir: Path) -> Dict[str, AttachmentLoader]:
+    """Attachment loaders for every file in a directory (read lazily)."""
+    return {
+        path.name: (lambda p=path: (p.read_bytes(), p.suffix.lower()))
+        for path in files_dir.iterdir()
+        if path.is_file()
+    }
+
+
+def main():
+    from app.database import engine
+    from app.models import User
+    from app.routers.uploads import save_upload, delete_upload, ALLOWED_EXTENSIONS
+    from app.config import get_settings
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Bulk import notes from JSONL or CSV")
+    parser.add_argument("path", help="JSONL or CSV file with one note per row")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Defaults to the file extension")
+    parser.add_argument("--author", required=True, help="Email of the user the notes are attributed to")
+    parser.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE)
+    parser.add_argument("--files-dir", help="Directory with attachments referenced by the 'file' column")
+    args = parser.parse_args()
+
+    attachments = {}
+    if args.files_dir:
+        attachments = {
+            name: loader
+            for name, loader in _directory_attachments(Path(args.files_dir)).items()
+            if Path(name).suffix.lower() in ALLOWED_EXTENSIONS
+        }
+
+    print(f"\n📥 Importing notes from {args.path}...\n")
+    with Session(engine) as session:
+        author = session.exec(select(User).where(User.email == args.author)).first()
+        if not author:
+            print(f"✗ User {args.author} not found")
+            raise SystemExit(1)
+
+        with open(args.path, encoding="utf-8-sig", newline="") as stream:
+            report = import_notes(
+                session,
+                iter_rows(stream, args.format or detect_format(args.path)),
+                author_id=author.id,
+                batch_size=args.batch_size,
+                attachments=attachments,
+                save_attachment=save_upload,
+                delete_attachment=delete_upload,
+            )
+
+    for error in report.errors:
+        print(f"  ✗ Row {error.row}: {error.error}")
+    print(f"\n✅ Imported {report.imported} notes ({report.failed} failed)\n")
+
+
+if __name__ == "__main__":
+    main()
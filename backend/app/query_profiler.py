@@ -0,0 +1,118 @@
+"""
+Per-request SQL profiling.
+
+Engine event hooks count queries and DB time for the current request and
+expose them as a Server-Timing header. Statements slower than SLOW_QUERY_MS
+are logged with normalized SQL, and the same statement shape running
+NPLUS1_THRESHOLD times within one request is flagged as a likely N+1.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger("app.sql")
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM_RE = re.compile(r"%\([^)]+\)s|%s|\?|:\w+|\$\d+")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Replace literals and bind parameters with ? and collapse IN lists and whitespace."""
+    sql = _STRING_RE.sub("?", statement)
+    sql = _PARAM_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _IN_LIST_RE.sub("(...)", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+class RequestQueryStats:
+    """Queries executed while handling one request."""
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.count = 0
+        self.total_seconds = 0.0
+        self.shapes: Counter = Counter()
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.total_seconds * 1000:.1f};desc="{self.count} queries"'
+
+
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def current_stats() -> Optional[RequestQueryStats]:
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    stats = _current_stats.get()
+
+    shape = None
+    if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        shape = normalize_sql(statement)
+        where = f" during {stats.label}" if stats else ""
+        logger.warning("Slow query (%.1f ms)%s: %s", elapsed * 1000, where, shape)
+
+    if stats is None:
+        return
+    stats.count += 1
+    stats.total_seconds += elapsed
+
+    shape = shape or normalize_sql(statement)
+    stats.shapes[shape] += 1
+    if stats.shapes[shape] == settings.NPLUS1_THRESHOLD:
+        logger.warning(
+            "Possible N+1: same statement ran %d times during %s: %s",
+            settings.NPLUS1_THRESHOLD, stats.label, shape
+        )
+
+
+def install(engine: Engine) -> None:
+    """Attach the profiling hooks to an engine."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryProfilingMiddleware:
+    """ASGI middleware collecting per-request query stats into a Server-Timing header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats(f"{scope['method']} {scope['path']}")
+        token = _current_stats.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_stats.reset(token)
@@ -0,0 +1,247 @@
+"""
+Rate limiting and per-route concurrency limits.
+
+Token buckets are keyed by the authenticated user when a valid bearer token
+is sent, otherwise by client IP. Buckets live in process memory by default;
+set RATE_LIMIT_BACKEND=redis to share them across instances (requires the
+optional `redis` package).
+
+Concurrency limits cap how many requests of a route run at once. Requests
+wait up to CONCURRENCY_MAX_WAIT seconds for a slot, and are shed with 503
+immediately when the queue is already as long as the limit.
+
+Both are applied as route dependencies:
+    @router.post("/login", dependencies=[Depends(rate_limit("login", "10/minute"))])
+"""
+import asyncio
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import get_settings
+
+settings = get_settings()
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_rate(spec: str) -> Tuple[float, int]:
+    """Parse "10/minute" into (tokens per second, burst size)."""
+    try:
+        count, period = spec.split("/")
+        count = int(count)
+        seconds = _PERIODS[period.strip().rstrip("s")]
+    except (ValueError, KeyError):
+        raise ValueError(f"Invalid rate limit '{spec}', expected e.g. '10/minute'")
+    return count / seconds, count
+
+
+class RateLimitBackend(ABC):
+    """Storage for token buckets."""
+
+    # Backends doing network I/O are called from the threadpool
+    blocking = False
+
+    @abstractmethod
+    def consume(self, key: str, rate: float, burst: int, cost: int = 1) -> Tuple[bool, float]:
+        """Take `cost` tokens; return (allowed, seconds until enough tokens are available)."""
+
+
+class MemoryBackend(RateLimitBackend):
+    """Per-process token buckets."""
+
+    def __init__(self, max_keys: int = 10_000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # key -> (tokens, updated, rate, burst); routes have different rates, so each bucket keeps its own
+        self._buckets: Dict[str, Tuple[float, float, float, int]] = {}
+
+    def consume(self, key: str, rate: float, burst: int, cost: int = 1) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, _, _ = self._buckets.get(key, (burst, now, rate, burst))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            if key not in self._buckets and len(self._buckets) >= self.max_keys:
+                self._prune(now)
+            self._buckets[key] = (tokens, now, rate, burst)
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+    def _prune(self, now: float) -> None:
+        # A bucket that has refilled completely is the same as no bucket
+        full = [
+            key for key, (tokens, updated, rate, burst) in self._buckets.items()
+            if tokens + (now - updated) * rate >= burst
+        ]
+        for key in full:
+            del self._buckets[key]
+        if len(self._buckets) >= self.max_keys:
+            oldest = min(self._buckets, key=lambda k: self._buckets[k][1])
+            del self._buckets[oldest]
+
+
+# Refill and take tokens atomically; uses the Redis clock so instances agree
+_REDIS_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(retry)}
+"""
+
+
+class RedisBackend(RateLimitBackend):
+    """Token buckets shared through Redis."""
+
+    blocking = True
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        import redis
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5)
+        self._script = self._client.register_script(_REDIS_TOKEN_BUCKET)
+
+    def consume(self, key: str, rate: float, burst: int, cost: int = 1) -> Tuple[bool, float]:
+        try:
+            allowed, retry_after = self._script(keys=[self.prefix + key], args=[rate, burst, cost])
+        except Exception as e:
+            # Fail open: an unavailable limiter must not take the API down with it
+            print(f"Rate limit backend error: {e}")
+            return True, 0.0
+        return bool(int(allowed)), float(retry_after)
+
+
+_backend: Optional[RateLimitBackend] = None
+
+
+def get_backend() -> RateLimitBackend:
+    """The configured rate limit backend (created on first use)."""
+    global _backend
+    if _backend is None:
+        if settings.RATE_LIMIT_BACKEND == "redis":
+            _backend = RedisBackend(settings.RATE_LIMIT_REDIS_URL)
+        else:
+            _backend = MemoryBackend()
+    return _backend
+
+
+def client_ip(request: Request) -> str:
+    """
+    The client address as seen by the outermost trusted proxy.
+    Each proxy appends the address it received the request from, so only the
+    last RATE_LIMIT_TRUSTED_PROXIES entries of X-Forwarded-For are trustworthy;
+    anything to their left was sent by the client and could be made up.
+    """
+    hops = settings.RATE_LIMIT_TRUSTED_PROXIES
+    if hops > 0:
+        forwarded = [ip.strip() for ip in request.headers.get("x-forwarded-for", "").split(",") if ip.strip()]
+        if forwarded:
+            return forwarded[-min(hops, len(forwarded))]
+    return request.client.host if request.client else "unknown"
+
+
+def client_key(request: Request) -> str:
+    """Bucket key: the user id for a valid bearer token, otherwise the client IP."""
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        from app.auth_utils import verify_token
+
+        payload = verify_token(authorization[7:])
+        if payload and payload.get("sub"):
+            return f"user:{payload['sub']}"
+    return f"ip:{client_ip(request)}"
+
+
+def _retry_after_header(seconds: float) -> Dict[str, str]:
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
+
+
+def rate_limit(scope: str, spec: str, cost: int = 1):
+    """Dependency enforcing a token bucket per client for one route."""
+    rate, burst = parse_rate(spec)
+
+    async def dependency(request: Request):
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        key = f"{scope}:{client_key(request)}"
+        backend = get_backend()
+        if backend.blocking:
+            allowed, retry_after = await run_in_threadpool(backend.consume, key, rate, burst, cost)
+        else:
+            allowed, retry_after = backend.consume(key, rate, burst, cost)
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please try again later",
+                headers=_retry_after_header(retry_after),
+            )
+
+    return dependency
+
+
+class ConcurrencyLimiter:
+    """Caps in-flight requests for a route, with a bounded wait queue."""
+
+    def __init__(self, scope: str, limit: int, max_wait: float):
+        self.scope = scope
+        self.limit = limit
+        self.max_wait = max_wait
+        self.waiting = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __call__(self):
+        if not settings.RATE_LIMIT_ENABLED or self.limit <= 0:
+            yield
+            return
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+
+        if self._semaphore.locked() and self.waiting >= self.limit:
+            raise self._overloaded()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            raise self._overloaded()
+        finally:
+            self.waiting -= 1
+
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+
+    def _overloaded(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again shortly",
+            headers=_retry_after_header(self.max_wait),
+        )
+
+
+def concurrency_limit(scope: str, limit: int, max_wait: Optional[float] = None) -> ConcurrencyLimiter:
+    """Dependency limiting how many requests of a route run at once."""
+    return ConcurrencyLimiter(scope, limit, settings.CONCURRENCY_MAX_WAIT if max_wait is None else max_wait)
@@ -0,0 +1,167 @@
+"""
+Read-replica routing.
+
+ReplicaPool hands out healthy replica engines round-robin. A monitor thread
+re-checks every replica with SELECT 1, and a replica that drops a connection
+is taken out of rotation until its next successful check. When no replica is
+healthy, reads go to the primary.
+
+Clients that just wrote through the primary are pinned to it for
+READ_YOUR_WRITES_SECONDS so they see their own changes despite replication
+lag. The pin is tracked in this process only.
+
+For local development and tests, SQLite replicas of a SQLite primary are
+kept up to date by copying the primary into each replica file with the
+sqlite3 backup API every SQLITE_REPLICA_SYNC_INTERVAL seconds:
+    DATABASE_URL=sqlite:///./sl_notes.db
+    DATABASE_READ_URLS=sqlite:///./sl_notes_replica.db
+"""
+import itertools
+import sqlite3
+import threading
+import time
+from typing import Callable, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine, make_url
+
+from app.cache_utils import TTLCache
+
+
+class Replica:
+    def __init__(self, url: str, engine: Engine):
+        self.url = url
+        self.engine = engine
+        self.healthy = True
+
+
+class ReplicaPool:
+    """Healthy-replica selection with background health checks."""
+
+    def __init__(self, urls: List[str], engine_factory: Callable[[str], Engine], check_interval: float):
+        self.replicas = [Replica(url, engine_factory(url)) for url in urls]
+        self.check_interval = check_interval
+        self._counter = itertools.count()
+        self._monitor: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        for replica in self.replicas:
+            event.listen(replica.engine, "handle_error", self._on_error(replica))
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self) -> Optional[Engine]:
+        """A healthy replica engine, or None when reads should go to the primary."""
+        if self._monitor is None:
+            self._start_monitor()
+        healthy = [r for r in self.replicas if r.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)].engine
+
+    def check(self) -> None:
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+                healthy = True
+            except Exception as e:
+                healthy = False
+                if replica.healthy:
+                    print(f"Read replica {_safe_url(replica.url)} is unavailable: {e}")
+            if healthy and not replica.healthy:
+                print(f"Read replica {_safe_url(replica.url)} is back in rotation")
+            replica.healthy = healthy
+
+    def _start_monitor(self) -> None:
+        with self._lock:
+            if self._monitor is not None:
+                return
+            # The first check runs inline so a dead replica is never handed out
+            self.check()
+            self._monitor = threading.Thread(target=self._run_monitor, name="replica-monitor", daemon=True)
+            self._monitor.start()
+
+    def _run_monitor(self) -> None:
+        while True:
+            time.sleep(self.check_interval)
+            self.check()
+
+    def _on_error(self, replica: Replica):
+        def handle_error(exception_context):
+            if exception_context.is_disconnect:
+                replica.healthy = False
+        return handle_error
+
+
+def _safe_url(url: str) -> str:
+    return make_url(url).render_as_string(hide_password=True)
+
+
+class WriteTracker:
+    """Remembers which clients wrote recently (read-your-writes pinning)."""
+
+    def __init__(self, window: float, max_clients: int = 10_000):
+        self._recent = TTLCache(ttl=window, max_entries=max_clients) if window > 0 else None
+
+    def record(self, client: str) -> None:
+        if self._recent is not None:
+            self._recent.set(client, True)
+
+    def is_pinned(self, client: str) -> bool:
+        return self._recent is not None and self._recent.get(client) is not None
+
+
+def sqlite_path(url: str) -> Optional[str]:
+    """Database file of a file-based SQLite URL, else None."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or parsed.database in (None, "", ":memory:"):
+        return None
+    return parsed.database
+
+
+def copy_sqlite(primary_path: str, replica_path: str) -> None:
+    """Copy a SQLite database into another file with the online backup API."""
+    source = sqlite3.connect(primary_path)
+    target = sqlite3.connect(replica_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+# Replica files already being copied to (startup may run more than once per process)
+_replicating = set()
+
+
+def start_sqlite_replication(primary_url: str, replica_urls: List[str], interval: float) -> bool:
+    """
+    Stand-in for streaming replication between SQLite files: copy the primary
+    into every SQLite replica now, then every `interval` seconds. Returns
+    False when the primary or a replica is not a SQLite file, or when the
+    copying is already running.
+    """
+    primary = sqlite_path(primary_url)
+    replicas = [sqlite_path(url) for url in replica_urls]
+    if not primary or not replicas or None in replicas or interval <= 0:
+        return False
+    if _replicating.intersection(replicas):
+        return False
+    _replicating.update(replicas)
+
+    def replicate():
+        for replica in replicas:
+            try:
+                copy_sqlite(primary, replica)
+            except sqlite3.Error as e:
+                print(f"SQLite replica copy to {replica} failed: {e}")
+
+    def run():
+        while True:
+            time.sleep(interval)
+            replicate()
+
+    replicate()
+    threading.Thread(target=run, name="sqlite-replication", daemon=True).start()
+    return True
@@ -1,18 +1,42 @@
 """
 Admin management router for admin-only operations.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session, select, func
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from sqlalchemy import update, delete
+from datetime import datetime
+import csv
+import io
+import json
+import os
 
-from app.database import get_session
+from app.database import get_session, engine
 from app.models import User, Note, Subject
-from app.schemas import MessageResponse
+from app.schemas import MessageResponse, NoteImportResponse, NoteResponse
 from app.auth_utils import get_admin_user
+from app.note_import import import_notes, iter_rows, detect_format
+from app.sync_utils import record_changes
+from app.routers.notes import notes_flight
+from app.routers.uploads import save_upload, delete_upload, ALLOWED_EXTENSIONS
+from app.config import get_settings
+from app.content_compression import decompress_text
 
+settings = get_settings()
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
+# Columns that can be exported (never password hashes or tokens)
+USER_EXPORT_COLUMNS = ["id", "email", "full_name", "is_verified", "is_admin", "created_at"]
+NOTE_EXPORT_COLUMNS = [
+    "id", "title", "content", "subject_id", "topic", "author_id", "file_url",
+    "is_published", "view_count", "created_at", "updated_at",
+]
+
+# Rows fetched per round-trip from the server-side cursor
+EXPORT_CHUNK_SIZE = 1000
+
 
 # Schemas
 class AdminStats(BaseModel):
@@ -41,6 +65,31 @@ class UserUpdate(BaseModel):
     is_admin: Optional[bool] = None
 
 
+class NoteBulkAction(BaseModel):
+    action: str = Field(..., pattern="^(publish|unpublish|delete)$")
+    # Selectors: an id list and/or filters (combined with AND)
+    ids: Optional[List[int]] = Field(None, max_length=10000)
+    subject_id: Optional[int] = None
+    author_id: Optional[int] = None
+    is_published: Optional[bool] = None
+    dry_run: bool = False
+
+
+class UserBulkAction(BaseModel):
+    action: str = Field(..., pattern="^(verify|unverify)$")
+    # Selectors: an id list and/or filters (combined with AND)
+    ids: Optional[List[int]] = Field(None, max_length=10000)
+    is_verified: Optional[bool] = None
+    email_domain: Optional[str] = None
+    dry_run: bool = False
+
+
+class BulkActionResponse(BaseModel):
+    action: str
+    matched: int
+    dry_run: bool
+
+
 # Admin dashboard stats
 @router.get("/stats", response_model=AdminStats)
 async def get_admin_stats(
@@ -131,8 +180,46 @@ async def delete_user(
     return MessageResponse(message="User deleted successfully")
 
 
+@router.post("/users/bulk", response_model=BulkActionResponse)
+async def bulk_update_users(
+    data: UserBulkAction,
+    session: Session = Depends(get_session),
+    admin: User = Depends(get_admin_user)
+):
+    """
+    Verify or unverify many users with one UPDATE statement (admin only).
+    With dry_run, only the number of matching users is returned.
+    """
+    conditions = []
+    if data.ids is not None:
+        conditions.append(User.id.in_(data.ids))
+    if data.is_verified is not None:
+        conditions.append(User.is_verified == data.is_verified)
+    if data.email_domain:
+        conditions.append(User.email.ilike(f"%@{data.email_domain}"))
+    if not conditions:
+        raise HTTPException(status_code=400, detail="Provide ids or at least one filter")
+
+    if data.action == "unverify":
+        # Never lock the acting admin out
+        conditions.append(User.id != admin.id)
+
+    if data.dry_run:
+        matched = session.exec(select(func.count(User.id)).where(*conditions)).one()
+        return BulkActionResponse(action=data.action, matched=matched, dry_run=True)
+
+    result = session.execute(
+        update(User)
+        .where(*conditions)
+        .values(is_verified=data.action == "verify")
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+    return BulkActionResponse(action=data.action, matched=result.rowcount, dry_run=False)
+
+
 # Notes management (for admin)
-@router.get("/notes")
+@router.get("/notes", response_model=List[NoteResponse])
 async def list_all_notes(
     session: Session = Depends(get_session),
     admin: User = Depends(get_admin_user)
@@ -144,6 +231,92 @@ async def list_all_notes(
     return notes
 
 
+# Streaming exports
+def _select_columns(model, allowed: List[str], columns: Optional[str]) -> list:
+    """Resolve a comma-separated column list against the allowed export columns."""
+    names = [c.strip() for c in columns.split(",") if c.strip()] if columns else allowed
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown columns: {', '.join(unknown)}. Allowed: {', '.join(allowed)}"
+        )
+    return [getattr(model, name) for name in names]
+
+
+def _export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return decompress_text(value)
+
+
+def _stream_export(statement, names: List[str], fmt: str):
+    """
+    Yield NDJSON lines or CSV chunks from a server-side cursor, one chunk at a time,
+    so memory use stays constant regardless of table size.
+    """
+    # Uses its own session: the request's session may be closed before streaming ends
+    with Session(engine) as session:
+        result = session.execute(
+            statement.execution_options(yield_per=EXPORT_CHUNK_SIZE, stream_results=True)
+        )
+
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(names)
+            for rows in result.partitions():
+                writer.writerows([[_export_value(v) for v in row] for row in rows])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+            return
+
+        for rows in result.partitions():
+            yield "".join(
+                json.dumps({name: _export_value(v) for name, v in zip(names, row)}, ensure_ascii=False) + "\n"
+                for row in rows
+            )
+
+
+def _export_response(statement, names: List[str], fmt: str, basename: str) -> StreamingResponse:
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    extension = "csv" if fmt == "csv" else "ndjson"
+    return StreamingResponse(
+        _stream_export(statement, names, fmt),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{basename}.{extension}"'},
+    )
+
+
+@router.get("/export/users")
+async def export_users(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    columns: Optional[str] = Query(None, description="Comma-separated columns to include"),
+    admin: User = Depends(get_admin_user)
+):
+    """Stream all users as NDJSON or CSV (admin only)."""
+    selected = _select_columns(User, USER_EXPORT_COLUMNS, columns)
+    statement = select(*selected).order_by(User.id)
+    return _export_response(statement, [c.key for c in selected], format, "users")
+
+
+@router.get("/export/notes")
+async def export_notes(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    columns: Optional[str] = Query(None, description="Comma-separated columns to include"),
+    subject_id: Optional[int] = None,
+    admin: User = Depends(get_admin_user)
+):
+    """Stream all notes (including unpublished) as NDJSON or CSV (admin only)."""
+    selected = _select_columns(Note, NOTE_EXPORT_COLUMNS, columns)
+    statement = select(*selected).order_by(Note.id)
+    if subject_id is not None:
+        statement = statement.where(Note.subject_id == subject_id)
+    return _export_response(statement, [c.key for c in selected], format, "notes")
+
+
 @router.put("/notes/{note_id}/publish", response_model=MessageResponse)
 async def toggle_publish_note(
     note_id: int,
@@ -158,6 +331,105 @@ async def toggle_publish_note(
     note.is_published = not note.is_published
     session.add(note)
     session.commit()
+    notes_flight.invalidate()
     return MessageResponse(
         message=f"Note {'published' if note.is_published else 'unpublished'}"
     )
+
+
+@router.post("/notes/bulk", response_model=BulkActionResponse)
+async def bulk_update_notes(
+    data: NoteBulkAction,
+    session: Session = Depends(get_session),
+    admin: User = Depends(get_admin_user)
+):
+    """
+    Publish, unpublish or delete many notes with one UPDATE/DELETE statement (admin only).
+    With dry_run, only the number of matching notes is returned.
+    """
+    conditions = []
+    if data.ids is not None:
+        conditions.append(Note.id.in_(data.ids))
+    if data.subject_id is not None:
+        conditions.append(Note.subject_id == data.subject_id)
+    if data.author_id is not None:
+        conditions.append(Note.author_id == data.author_id)
+    if data.is_published is not None:
+        conditions.append(Note.is_published == data.is_published)
+    if not conditions:
+        raise HTTPException(status_code=400, detail="Provide ids or at least one filter")
+
+    if data.dry_run:
+        matched = session.exec(select(func.count(Note.id)).where(*conditions)).one()
+        return BulkActionResponse(action=data.action, matched=matched, dry_run=True)
+
+    if data.action == "delete":
+        statement = delete(Note).where(*conditions)
+        operation = "delete"
+    else:
+        statement = (
+            update(Note)
+            .where(*conditions)
+            .values(is_published=data.action == "publish", updated_at=datetime.utcnow())
+        )
+        operation = "upsert"
+
+    note_ids = session.execute(
+        statement.returning(Note.id).execution_options(synchronize_session=False)
+    ).scalars().all()
+    record_changes(session, "note", note_ids, operation)
+    session.commit()
+    notes_flight.invalidate()
+    return BulkActionResponse(action=data.action, matched=len(note_ids), dry_run=False)
+
+
+# Bulk import
+def _attachment_loader(upload: UploadFile):
+    """Read and validate an uploaded attachment only when a row references it."""
+    def load():
+        file_ext = os.path.splitext(upload.filename)[1].lower()
+        if file_ext not in ALLOWED_EXTENSIONS:
+            raise ValueError(f"Attachment '{upload.filename}' has a disallowed file type")
+        upload.file.seek(0)
+        content = upload.file.read()
+        if len(content) > settings.MAX_UPLOAD_SIZE:
+            raise ValueError(f"Attachment '{upload.filename}' is too large")
+        return content, file_ext
+    return load
+
+
+@router.post("/import/notes", response_model=NoteImportResponse)
+async def import_notes_file(
+    file: UploadFile = File(..., description="JSONL or CSV file with one note per row"),
+    attachments: List[UploadFile] = File(default=[], description="Files referenced by the 'file' column"),
+    batch_size: int = Query(settings.IMPORT_BATCH_SIZE, ge=1, le=5000),
+    session: Session = Depends(get_session),
+    admin: User = Depends(get_admin_user)
+):
+    """
+    Bulk import notes (admin only).
+    Rows are streamed, validated and inserted in batches; invalid rows are
+    reported without aborting the rest of the import.
+    """
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        report = import_notes(
+            session,
+            iter_rows(stream, detect_format(file.filename or "")),
+            author_id=admin.id,
+            batch_size=batch_size,
+            attachments={
+                os.path.basename(upload.filename): _attachment_loader(upload)
+                for upload in attachments
+                if upload.filename
+            },
+            save_attachment=save_upload,
+            delete_attachment=delete_upload,
+        )
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Import file must be UTF-8 encoded"
+        )
+    notes_flight.invalidate()
+    return report
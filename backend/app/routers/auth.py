@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlmodel import Session, select
 from datetime import timedelta
@@ -15,12 +16,21 @@ from app.auth_utils import (
 )
 from app.config import get_settings
 from app.email_utils import send_verification_email
+from app.rate_limit import rate_limit, concurrency_limit
 
 settings = get_settings()
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+# bcrypt runs in the threadpool; cap how many hashes are computed at once
+auth_concurrency = concurrency_limit("auth", settings.CONCURRENCY_LIMIT_AUTH)
 
-@router.post("/register", response_model=MessageResponse, status_code=status.HTTP_201_CREATED)
+
+@router.post(
+    "/register",
+    response_model=MessageResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit("register", settings.RATE_LIMIT_REGISTER)), Depends(auth_concurrency)],
+)
 async def register(user_data: UserCreate, session: Session = Depends(get_session)):
     """Register a new user account."""
     # Check if email already exists
@@ -38,7 +48,7 @@ async def register(user_data: UserCreate, session: Session = Depends(get_session
     new_user = User(
         full_name=user_data.full_name,
         email=user_data.email,
-        hashed_password=hash_password(user_data.password)
+        hashed_password=await run_in_threadpool(hash_password, user_data.password)
     )
     
     session.add(new_user)
@@ -47,7 +57,7 @@ async def register(user_data: UserCreate, session: Session = Depends(get_session
     
     # Send verification email (optional - can fail silently in dev)
     try:
-        await send_verification_email(new_user.email, new_user.verification_token)
+        await run_in_threadpool(send_verification_email, new_user.email, new_user.verification_token)
     except Exception as e:
         print(f"Email sending failed: {e}")
     
@@ -57,7 +67,11 @@ async def register(user_data: UserCreate, session: Session = Depends(get_session
     )
 
 
-@router.post("/login", response_model=Token)
+@router.post(
+    "/login",
+    response_model=Token,
+    dependencies=[Depends(rate_limit("login", settings.RATE_LIMIT_LOGIN)), Depends(auth_concurrency)],
+)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     session: Session = Depends(get_session)
@@ -68,7 +82,7 @@ async def login(
         select(User).where(User.email == form_data.username)
     ).first()
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await run_in_threadpool(verify_password, form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -0,0 +1,80 @@
+"""
+Aggregated feed endpoints: everything a page needs in one request and one session.
+"""
+from fastapi import APIRouter, Depends
+from sqlmodel import Session, select, func
+
+from app.database import get_read_session
+from app.models import Note, Subject, User
+from app.schemas import HomeFeedResponse, DashboardFeedResponse, SubjectWithCount
+from app.auth_utils import get_current_user
+from app.cache_utils import TTLCache
+from app.config import get_settings
+
+settings = get_settings()
+router = APIRouter(prefix="/feed", tags=["Feed"])
+
+# Number of recent notes shown on each page
+HOME_RECENT_NOTES = 6
+DASHBOARD_RECENT_NOTES = 5
+
+# The home feed is the same for every visitor, so it is cached briefly
+home_feed_cache = TTLCache(ttl=settings.HOME_FEED_CACHE_TTL, max_entries=1)
+
+
+def _recent_published_notes(session: Session, limit: int):
+    return session.exec(
+        select(Note)
+        .where(Note.is_published == True)
+        .order_by(Note.created_at.desc())
+        .limit(limit)
+    ).all()
+
+
+@router.get("/home", response_model=HomeFeedResponse)
+async def home_feed(session: Session = Depends(get_read_session)):
+    """Active subjects with published note counts, plus the latest notes."""
+    cached = home_feed_cache.get("home")
+    if cached is not None:
+        return cached
+
+    note_counts = (
+        select(Note.subject_id, func.count(Note.id).label("note_count"))
+        .where(Note.is_published == True)
+        .group_by(Note.subject_id)
+        .subquery()
+    )
+    rows = session.exec(
+        select(Subject, func.coalesce(note_counts.c.note_count, 0))
+        .outerjoin(note_counts, note_counts.c.subject_id == Subject.id)
+        .where(Subject.is_active == True)
+        .order_by(Subject.name)
+    ).all()
+
+    feed = HomeFeedResponse(
+        subjects=[
+            SubjectWithCount.model_validate(subject).model_copy(update={"note_count": count})
+            for subject, count in rows
+        ],
+        recent_notes=_recent_published_notes(session, HOME_RECENT_NOTES),
+    )
+    home_feed_cache.set("home", feed)
+    return feed
+
+
+@router.get("/dashboard", response_model=DashboardFeedResponse)
+async def dashboard_feed(
+    session: Session = Depends(get_read_session),
+    current_user: User = Depends(get_current_user)
+):
+    """The current user's notes plus the latest published notes."""
+    my_notes = session.exec(
+        select(Note)
+        .where(Note.author_id == current_user.id)
+        .order_by(Note.created_at.desc())
+    ).all()
+
+    return DashboardFeedResponse(
+        my_notes=my_notes,
+        recent_notes=_recent_published_notes(session, DASHBOARD_RECENT_NOTES),
+    )
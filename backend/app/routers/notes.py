@@ -1,22 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlmodel import Session, select
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select, func, update
+from typing import List, Optional, Tuple
 from datetime import datetime
 
-from app.database import get_session
+from app.database import engine, db_writer, get_session, get_read_engine, get_read_session
 from app.models import Note, Subject, User
-from app.schemas import NoteCreate, NoteUpdate, NoteResponse, NoteListResponse, MessageResponse
+from app.schemas import (
+    NoteCreate, NoteUpdate, NoteResponse, NoteListResponse, NoteBatchRequest, NoteBatchResponse, MessageResponse
+)
 from app.auth_utils import get_current_active_user, get_current_user
+from app.cache_utils import SingleFlight
+from app.config import get_settings
+
+settings = get_settings()
 
 router = APIRouter(prefix="/notes", tags=["Notes"])
 
+# Maximum number of ids accepted by GET /notes/batch
+MAX_BATCH_GET_IDS = 100
+
+# Published notes are public: caches may store them but must revalidate (view counts change)
+PUBLISHED_CACHE_CONTROL = "public, no-cache"
+
+# Identical concurrent reads share one query and one serialization
+notes_flight = SingleFlight("notes", cache_ttl=settings.NOTES_MICRO_CACHE_TTL)
+
 
 # IMPORTANT: Static routes MUST be defined BEFORE dynamic routes
 # Otherwise "/user/me" would be matched by "/{note_id}" with note_id="user"
 
 @router.get("/user/me", response_model=List[NoteResponse])
 async def get_my_notes(
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
     current_user: User = Depends(get_current_user)
 ):
     """Get all notes created by the current user."""
@@ -29,17 +45,29 @@ async def get_my_notes(
     return notes
 
 
-@router.get("", response_model=NoteListResponse)
-async def list_notes(
-    subject_id: Optional[int] = None,
-    exam_type: Optional[str] = Query(None, pattern="^(OL|AL)$"),
-    topic: Optional[str] = None,
-    published_only: bool = Query(True),
-    page: int = Query(1, ge=1),
-    per_page: int = Query(20, ge=1, le=100),
-    session: Session = Depends(get_session)
-):
-    """List notes with optional filtering and pagination."""
+def _list_notes_json(
+    read_engine: Engine,
+    subject_id: Optional[int],
+    exam_type: Optional[str],
+    topic: Optional[str],
+    published_only: bool,
+    page: int,
+    per_page: int,
+) -> bytes:
+    """Run a note listing in its own session and return the serialized page."""
+    with Session(read_engine) as session:
+        return _list_notes(session, subject_id, exam_type, topic, published_only, page, per_page).model_dump_json().encode()
+
+
+def _list_notes(
+    session: Session,
+    subject_id: Optional[int],
+    exam_type: Optional[str],
+    topic: Optional[str],
+    published_only: bool,
+    page: int,
+    per_page: int,
+) -> NoteListResponse:
     query = select(Note)
     
     if subject_id:
@@ -60,7 +88,7 @@ async def list_notes(
         query = query.where(Note.is_published == True)
     
     # Count total
-    total = len(session.exec(query).all())
+    total = session.exec(select(func.count()).select_from(query.subquery())).one()
     
     # Apply pagination
     offset = (page - 1) * per_page
@@ -75,24 +103,127 @@ async def list_notes(
     )
 
 
+@router.get("", response_model=NoteListResponse)
+async def list_notes(
+    request: Request,
+    subject_id: Optional[int] = None,
+    exam_type: Optional[str] = Query(None, pattern="^(OL|AL)$"),
+    topic: Optional[str] = None,
+    published_only: bool = Query(True),
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
+):
+    """List notes with optional filtering and pagination."""
+    # Topic matching is case-insensitive, so differently cased requests can share a result
+    topic = topic.strip().lower() if topic and topic.strip() else None
+    read_engine = get_read_engine(request)
+    key = ("list", id(read_engine), subject_id or None, exam_type, topic, published_only, page, per_page)
+    body = await notes_flight.do(
+        key, _list_notes_json, read_engine, subject_id or None, exam_type, topic, published_only, page, per_page
+    )
+    headers = {"Cache-Control": PUBLISHED_CACHE_CONTROL} if published_only else None
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _parse_note_ids(ids: str) -> List[int]:
+    """Parse a comma-separated list of note IDs."""
+    try:
+        return [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers"
+        )
+
+
+def _get_notes_batch(session: Session, note_ids: List[int]) -> NoteBatchResponse:
+    """Load notes with a single IN query, keeping the requested order."""
+    # Drop duplicates but keep the first occurrence's position
+    note_ids = list(dict.fromkeys(note_ids))
+    
+    found = {
+        note.id: note
+        for note in session.exec(select(Note).where(Note.id.in_(note_ids))).all()
+    }
+    
+    return NoteBatchResponse(
+        notes=[found[note_id] for note_id in note_ids if note_id in found],
+        missing=[note_id for note_id in note_ids if note_id not in found]
+    )
+
+
+@router.get("/batch", response_model=NoteBatchResponse)
+async def get_notes_batch(
+    ids: str = Query(..., description="Comma-separated note IDs, e.g. 3,1,2"),
+    session: Session = Depends(get_read_session)
+):
+    """
+    Get several notes in one request, in the requested order.
+    Unlike GET /notes/{note_id}, this does not count as a view.
+    """
+    note_ids = _parse_note_ids(ids)
+    
+    if not note_ids or len(note_ids) > MAX_BATCH_GET_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Provide between 1 and {MAX_BATCH_GET_IDS} ids (use POST /notes/batch for more)"
+        )
+    
+    return _get_notes_batch(session, note_ids)
+
+
+@router.post("/batch", response_model=NoteBatchResponse)
+async def post_notes_batch(
+    request: NoteBatchRequest,
+    session: Session = Depends(get_read_session)
+):
+    """Get several notes in one request (for ID lists too long for a query string)."""
+    return _get_notes_batch(session, request.ids)
+
+
+def _note_json(note_id: int, read_engine: Engine) -> Optional[Tuple[bytes, bool]]:
+    """Load a note in its own session and return it serialized with its published flag, or None if missing."""
+    with Session(read_engine) as session:
+        note = session.get(Note, note_id)
+    if note is None and read_engine is not engine:
+        # The replica may not have caught up with a note that was just created
+        with Session(engine) as session:
+            note = session.get(Note, note_id)
+    if note is None:
+        return None
+    return NoteResponse.model_validate(note).model_dump_json().encode(), note.is_published
+
+
 @router.get("/{note_id}", response_model=NoteResponse)
-async def get_note(note_id: int, session: Session = Depends(get_session)):
+async def get_note(note_id: int, request: Request, session: Session = Depends(get_session)):
     """Get a single note and increment view count."""
-    note = session.get(Note, note_id)
+    if db_writer is None:
+        # Increment view count atomically (concurrent views must not overwrite each other)
+        result = session.exec(
+            update(Note).where(Note.id == note_id).values(view_count=Note.view_count + 1)
+        )
+        session.commit()
+        if not result.rowcount:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Note not found"
+            )
     
-    if not note:
+    read_engine = get_read_engine(request)
+    loaded = await notes_flight.do(("note", id(read_engine), note_id), _note_json, note_id, read_engine)
+    if loaded is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Note not found"
         )
     
-    # Increment view count
-    note.view_count += 1
-    session.add(note)
-    session.commit()
-    session.refresh(note)
+    if db_writer is not None:
+        # Queued and applied in batches by the single writer connection
+        db_writer.record_view(note_id)
     
-    return note
+    body, is_published = loaded
+    headers = {"Cache-Control": PUBLISHED_CACHE_CONTROL} if is_published else None
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.post("", response_model=NoteResponse, status_code=status.HTTP_201_CREATED)
@@ -118,6 +249,7 @@ async def create_note(
     session.add(new_note)
     session.commit()
     session.refresh(new_note)
+    notes_flight.invalidate()
     
     return new_note
 
@@ -153,6 +285,7 @@ async def update_note(
     session.add(note)
     session.commit()
     session.refresh(note)
+    notes_flight.invalidate()
     
     return note
 
@@ -181,5 +314,6 @@ async def delete_note(
     
     session.delete(note)
     session.commit()
+    notes_flight.invalidate()
     
     return MessageResponse(message="Note deleted successfully")
@@ -1,42 +1,169 @@
 from fastapi import APIRouter, Depends, Query
-from sqlmodel import Session, select, or_, and_
-from typing import List, Optional
+from sqlmodel import Session, select, or_, and_, func
+from sqlalchemy import literal
+from typing import List, Optional, Set
+from collections import Counter
 
-from app.database import get_session
+from app.database import get_read_session
 from app.models import Note, Subject
-from app.schemas import NoteResponse, SearchResponse
+from app.schemas import FacetCount, SearchFacets, SearchHit, SearchResponse
+from app.search_utils import note_index, make_snippet
+from app.config import get_settings
+from app.content_compression import decompress_text, searchable_content
+from app.rate_limit import rate_limit, concurrency_limit
 
+settings = get_settings()
 router = APIRouter(prefix="/search", tags=["Search"])
 
+# Most frequent topics returned in the topic facet
+MAX_TOPIC_FACETS = 20
 
-@router.get("", response_model=SearchResponse)
+
+def _fuzzy_search(
+    session: Session,
+    q: str,
+    filters: list,
+    exclude_ids: Set[int],
+    limit: int,
+) -> List[Note]:
+    """
+    Typo-tolerant fallback ranked by trigram similarity.
+    Candidates are fetched SEARCH_FUZZY_CANDIDATES at a time so this never becomes a full scan.
+    """
+    candidates = settings.SEARCH_FUZZY_CANDIDATES
+
+    if session.get_bind().dialect.name == "postgresql":
+        # `<%` uses the pg_trgm GIN indexes created in database.create_search_indexes
+        session.exec(select(func.set_config(
+            "pg_trgm.word_similarity_threshold", str(settings.SEARCH_FUZZY_THRESHOLD), True
+        )))
+        score = func.greatest(
+            func.word_similarity(q, Note.title),
+            func.word_similarity(q, func.coalesce(Note.topic, "")),
+            func.word_similarity(q, Note.content),
+        )
+        query = select(Note).where(
+            *filters,
+            or_(
+                literal(q).op("<%")(Note.title),
+                literal(q).op("<%")(Note.topic),
+                literal(q).op("<%")(Note.content),
+            )
+        )
+        if exclude_ids:
+            query = query.where(Note.id.notin_(exclude_ids))
+        query = query.order_by(score.desc()).limit(min(limit, candidates))
+        return list(session.exec(query).all())
+
+    note_index.ensure_fresh(session)
+    ranked = [
+        (note_id, score)
+        for note_id, score, _ in note_index.lookup(q, threshold=settings.SEARCH_FUZZY_THRESHOLD)
+        if note_id not in exclude_ids
+    ]
+
+    # Filters are applied to each batch of ranked ids before truncating, so
+    # subject/topic drill-downs still find matches ranked below the first batch
+    scores = dict(ranked)
+    notes: List[Note] = []
+    for i in range(0, len(ranked), candidates):
+        batch = [note_id for note_id, _ in ranked[i:i + candidates]]
+        notes += session.exec(select(Note).where(*filters, Note.id.in_(batch))).all()
+        if len(notes) >= limit:
+            break
+    notes.sort(key=lambda n: (scores[n.id], n.view_count), reverse=True)
+    return notes[:limit]
+
+
+def _to_hit(note: Note, q: str, include_content: bool) -> SearchHit:
+    """Build a search hit with a snippet around the matched terms."""
+    content = decompress_text(note.content)
+    snippet, highlights = make_snippet(
+        content, q,
+        width=settings.SEARCH_SNIPPET_LENGTH,
+        fuzzy_threshold=settings.SEARCH_FUZZY_THRESHOLD,
+    )
+    return SearchHit(
+        id=note.id,
+        title=note.title,
+        topic=note.topic,
+        subject_id=note.subject_id,
+        author_id=note.author_id,
+        file_url=note.file_url,
+        is_published=note.is_published,
+        view_count=note.view_count,
+        created_at=note.created_at,
+        updated_at=note.updated_at,
+        snippet=snippet,
+        highlights=highlights,
+        content=content if include_content else None,
+    )
+
+
+def _facet_counts(session: Session, filters: list, match_conditions) -> SearchFacets:
+    """
+    Count matching notes per subject, exam type and topic.
+    All three facets are rolled up from a single grouped query.
+    """
+    rows = session.exec(
+        select(Note.subject_id, Subject.exam_type, Note.topic, func.count(Note.id))
+        .join(Subject, Subject.id == Note.subject_id)
+        .where(*filters, match_conditions)
+        .group_by(Note.subject_id, Subject.exam_type, Note.topic)
+    ).all()
+
+    by_subject, by_exam_type, by_topic = Counter(), Counter(), Counter()
+    for subject_id, exam_type, topic, count in rows:
+        by_subject[subject_id] += count
+        by_exam_type[exam_type] += count
+        if topic:
+            by_topic[topic] += count
+
+    return SearchFacets(
+        subject_id=[FacetCount(value=v, count=c) for v, c in by_subject.most_common()],
+        exam_type=[FacetCount(value=v, count=c) for v, c in by_exam_type.most_common()],
+        topic=[FacetCount(value=v, count=c) for v, c in by_topic.most_common(MAX_TOPIC_FACETS)],
+    )
+
+
+@router.get(
+    "",
+    response_model=SearchResponse,
+    dependencies=[
+        Depends(rate_limit("search", settings.RATE_LIMIT_SEARCH)),
+        Depends(concurrency_limit("search", settings.CONCURRENCY_LIMIT_SEARCH)),
+    ],
+)
 async def search_notes(
     q: str = Query(..., min_length=2, description="Search query"),
     exam_type: Optional[str] = Query(None, pattern="^(OL|AL)$"),
     subject_id: Optional[int] = None,
+    topic: Optional[str] = None,
     limit: int = Query(50, ge=1, le=100),
-    session: Session = Depends(get_session)
+    include_content: bool = Query(False, description="Return full note content with each hit"),
+    facets: bool = Query(False, description="Include result counts per subject, exam type and topic"),
+    session: Session = Depends(get_read_session)
 ):
     """
     Search notes by title, content, or topic.
-    Returns notes matching the query string.
+    Returns notes matching the query string. When there are only a few exact
+    matches, results are topped up with typo-tolerant (trigram) matches.
+    Each hit carries a highlighted snippet; full content only on request.
+    With facets=true, counts for the whole matching set are returned as well.
     """
     # Build search conditions - handle None topic gracefully
     search_conditions = or_(
         Note.title.ilike(f"%{q}%"),
-        Note.content.ilike(f"%{q}%"),
+        searchable_content().ilike(f"%{q}%"),
         and_(Note.topic.isnot(None), Note.topic.ilike(f"%{q}%"))
     )
     
-    # Base query with search conditions
-    query = select(Note).where(
-        Note.is_published == True,
-        search_conditions
-    )
+    # Filters shared by the exact and fuzzy queries
+    filters = [Note.is_published == True]
     
     # Filter by subject if provided
     if subject_id:
-        query = query.where(Note.subject_id == subject_id)
+        filters.append(Note.subject_id == subject_id)
     
     # Filter by exam type if provided
     if exam_type:
@@ -44,23 +171,46 @@ async def search_notes(
             select(Subject.id).where(Subject.exam_type == exam_type)
         ).all()
         if subject_ids:
-            query = query.where(Note.subject_id.in_(subject_ids))
+            filters.append(Note.subject_id.in_(subject_ids))
+    
+    # Filter by topic if provided (facet drill-down)
+    if topic:
+        filters.append(Note.topic == topic)
     
     # Execute query with limit
+    query = select(Note).where(*filters, search_conditions)
     query = query.limit(limit).order_by(Note.view_count.desc())
-    notes = session.exec(query).all()
+    notes = list(session.exec(query).all())
+    
+    # Fall back to fuzzy matching when exact matches are sparse
+    fuzzy_notes = []
+    if len(notes) < min(limit, settings.SEARCH_FUZZY_MIN_RESULTS):
+        fuzzy_notes = _fuzzy_search(
+            session, q, filters,
+            exclude_ids={n.id for n in notes},
+            limit=limit - len(notes),
+        )
+    
+    facet_counts = None
+    if facets:
+        match_conditions = search_conditions
+        if fuzzy_notes:
+            match_conditions = or_(search_conditions, Note.id.in_([n.id for n in fuzzy_notes]))
+        facet_counts = _facet_counts(session, filters, match_conditions)
     
+    notes += fuzzy_notes
     return SearchResponse(
-        notes=notes,
+        notes=[_to_hit(note, q, include_content) for note in notes],
         total=len(notes),
-        query=q
+        query=q,
+        facets=facet_counts
     )
 
 
 @router.get("/subjects", response_model=List[dict])
 async def search_subjects(
     q: str = Query(..., min_length=1, description="Search query"),
-    session: Session = Depends(get_session)
+    session: Session = Depends(get_read_session)
 ):
     """Search subjects by name."""
     subjects = session.exec(
@@ -1,20 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlmodel import Session, select
 from typing import List, Optional
 
-from app.database import get_session
+from app.database import get_session, get_read_session
 from app.models import Subject
 from app.schemas import SubjectCreate, SubjectUpdate, SubjectResponse, MessageResponse
 from app.auth_utils import get_admin_user
 
 router = APIRouter(prefix="/subjects", tags=["Subjects"])
 
+# Subjects rarely change; shared caches (and the compressed-response cache) may keep them briefly
+SUBJECTS_CACHE_CONTROL = "public, max-age=60"
+
 
 @router.get("", response_model=List[SubjectResponse])
 async def list_subjects(
+    response: Response,
     exam_type: Optional[str] = Query(None, pattern="^(OL|AL)$"),
     active_only: bool = Query(True),
-    session: Session = Depends(get_session)
+    session: Session = Depends(get_read_session)
 ):
     """List all subjects, optionally filtered by exam type."""
     query = select(Subject)
@@ -28,11 +32,12 @@ async def list_subjects(
     query = query.order_by(Subject.name)
     subjects = session.exec(query).all()
     
+    response.headers["Cache-Control"] = SUBJECTS_CACHE_CONTROL
     return subjects
 
 
 @router.get("/{subject_id}", response_model=SubjectResponse)
-async def get_subject(subject_id: int, session: Session = Depends(get_session)):
+async def get_subject(subject_id: int, response: Response, session: Session = Depends(get_read_session)):
     """Get a single subject by ID."""
     subject = session.get(Subject, subject_id)
     
@@ -42,6 +47,7 @@ async def get_subject(subject_id: int, session: Session = Depends(get_session)):
             detail="Subject not found"
         )
     
+    response.headers["Cache-Control"] = SUBJECTS_CACHE_CONTROL
     return subject
 
 
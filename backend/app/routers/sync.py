@@ -0,0 +1,111 @@
+"""
+Delta sync for offline-capable clients.
+"""
+from datetime import timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import Session, select, func
+
+from app.config import get_settings
+from app.database import get_read_session
+from app.models import ChangeLog, Note, Subject
+from app.schemas import SyncResponse
+
+settings = get_settings()
+router = APIRouter(prefix="/sync", tags=["Sync"])
+
+
+def _snapshot_page(session: Session, token: int, after_id: Optional[int], limit: int) -> SyncResponse:
+    """One page of a full snapshot, in note id order."""
+    if after_id is None:
+        # Pinned when the snapshot starts, so changes made while it is paged are synced afterwards
+        token = session.exec(select(func.max(ChangeLog.id))).one() or 0
+    notes = session.exec(
+        select(Note)
+        .where(Note.is_published == True, Note.id > (after_id or 0))
+        .order_by(Note.id)
+        .limit(limit)
+    ).all()
+    has_more = len(notes) == limit
+    return SyncResponse(
+        notes=notes,
+        # Subjects are few, so they all come with the first page
+        subjects=session.exec(select(Subject).where(Subject.is_active == True)).all() if after_id is None else [],
+        deleted_note_ids=[],
+        deleted_subject_ids=[],
+        next_token=token,
+        has_more=has_more,
+        snapshot_after=notes[-1].id if has_more else None
+    )
+
+
+def _late_changes(session: Session, since: int) -> List[ChangeLog]:
+    """
+    Changes at or below a token that may have committed after it was handed out.
+    ChangeLog ids are allocated on insert but become visible on commit, so on
+    PostgreSQL a slower transaction can commit an id below a token a client
+    already holds. SQLite commits one writer at a time, so ids appear in order.
+    """
+    if session.get_bind().dialect.name == "sqlite":
+        return []
+    since_at = session.exec(select(ChangeLog.changed_at).where(ChangeLog.id == since)).first()
+    if since_at is None:
+        return []
+    cutoff = since_at - timedelta(seconds=settings.SYNC_LATE_COMMIT_SECONDS)
+    late = []
+    # Walk back from the token along the primary key until changes are older than the window
+    rows = session.exec(
+        select(ChangeLog).where(ChangeLog.id <= since).order_by(ChangeLog.id.desc()).execution_options(yield_per=100)
+    )
+    for change in rows:
+        if change.changed_at < cutoff:
+            break
+        late.append(change)
+    return late
+
+
+@router.get("", response_model=SyncResponse)
+async def sync(
+    since: int = Query(0, ge=0, description="Change token from the previous sync (0 for a full snapshot)"),
+    limit: int = Query(500, ge=1, le=1000, description="Maximum number of changes to return"),
+    snapshot_after: Optional[int] = Query(None, ge=0, description="Continue a full snapshot after this note id"),
+    session: Session = Depends(get_read_session)
+):
+    """
+    Return notes and subjects changed since a change token.
+    Unpublished notes and inactive subjects are reported as deleted, since
+    clients only cache what they can see. Keep calling with next_token while
+    has_more is true. since=0 pages through a full snapshot first: pass
+    snapshot_after back along with next_token until it is null.
+    """
+    if since == 0 or snapshot_after is not None:
+        return _snapshot_page(session, since, snapshot_after, limit)
+
+    changes = session.exec(
+        select(ChangeLog)
+        .where(ChangeLog.id > since)
+        .order_by(ChangeLog.id)
+        .limit(limit)
+    ).all()
+
+    # Only the current state matters, so collapse repeated changes per entity
+    changed = {"note": set(), "subject": set()}
+    for change in _late_changes(session, since) + list(changes):
+        changed[change.entity_type].add(change.entity_id)
+
+    notes = session.exec(
+        select(Note).where(Note.id.in_(changed["note"]), Note.is_published == True)
+    ).all() if changed["note"] else []
+    subjects = session.exec(
+        select(Subject).where(Subject.id.in_(changed["subject"]), Subject.is_active == True)
+    ).all() if changed["subject"] else []
+
+    return SyncResponse(
+        notes=notes,
+        subjects=subjects,
+        deleted_note_ids=sorted(changed["note"] - {n.id for n in notes}),
+        deleted_subject_ids=sorted(changed["subject"] - {s.id for s in subjects}),
+        next_token=changes[-1].id if changes else since,
+        has_more=len(changes) == limit
+    )
@@ -0,0 +1,378 @@
+"""
+Resumable uploads (tus-style) for large files on unreliable connections.
+
+    POST   /upload/sessions                 start: filename, total length, sha256, optional note_id
+    HEAD   /upload/sessions/{id}            progress (Upload-Offset, Upload-Length)
+    PATCH  /upload/sessions/{id}            append the body at Upload-Offset
+                                            (Content-Type: application/offset+octet-stream,
+                                            optional Upload-Checksum: sha256 <base64 digest>)
+    POST   /upload/sessions/{id}/complete   verify size and checksum, move to storage
+                                            and attach to the note like POST /upload
+    DELETE /upload/sessions/{id}            abandon
+
+Each PATCH body is received into its own chunk file, then claims its byte
+range with a conditional UPDATE of the session offset (WHERE offset =
+Upload-Offset), so of two concurrent PATCHes at the same offset only one is
+accepted, in any process. The winner copies its bytes into the session's
+staging file at that offset. When a connection drops mid-chunk the bytes
+that arrived are kept, so the client asks HEAD for the offset and continues
+from there. The whole file is checked against its sha256 before it is
+published. Sessions idle for RESUMABLE_UPLOAD_EXPIRY_HOURS are removed
+together with their staged bytes.
+
+UPLOAD_STAGING_DIR has to be shared by all instances serving the API.
+"""
+import base64
+import binascii
+import hashlib
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from pathlib import Path
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, update
+from sqlmodel import Session, select
+from starlette.requests import ClientDisconnect
+
+from app.database import get_session
+from app.models import UploadSession, User
+from app.schemas import MessageResponse, UploadSessionCreate, UploadSessionResponse
+from app.auth_utils import get_current_active_user
+from app.config import get_settings
+from app.routers.uploads import ALLOWED_EXTENSIONS, attach_to_note, new_upload_filename
+from app.storage import get_storage
+from app.tracing import span
+from app import image_utils
+
+settings = get_settings()
+router = APIRouter(prefix="/upload/sessions", tags=["File Uploads"])
+
+TUS_VERSION = "1.0.0"
+CHUNK_CONTENT_TYPE = "application/offset+octet-stream"
+# tus checksum extension: the chunk did not match its Upload-Checksum
+HTTP_460_CHECKSUM_MISMATCH = 460
+
+
+def get_staging_dir() -> Path:
+    """Ensure the staging directory exists and return its path."""
+    app_dir = Path(__file__).parent.parent
+    staging_path = app_dir / settings.UPLOAD_STAGING_DIR
+    staging_path.mkdir(parents=True, exist_ok=True)
+    return staging_path
+
+
+def _staging_path(upload: UploadSession) -> Path:
+    return get_staging_dir() / f"{upload.id}.part"
+
+
+def _new_expiry() -> datetime:
+    return datetime.utcnow() + timedelta(hours=settings.RESUMABLE_UPLOAD_EXPIRY_HOURS)
+
+
+def _progress_headers(upload: UploadSession) -> dict:
+    return {
+        "Tus-Resumable": TUS_VERSION,
+        "Upload-Offset": str(upload.offset),
+        "Upload-Length": str(upload.length),
+        "Upload-Expires": format_datetime(upload.expires_at.replace(tzinfo=timezone.utc), usegmt=True),
+        "Cache-Control": "no-store",
+    }
+
+
+def _to_response(upload: UploadSession) -> UploadSessionResponse:
+    return UploadSessionResponse(
+        id=upload.id,
+        upload_url=f"/upload/sessions/{upload.id}",
+        filename=upload.filename,
+        length=upload.length,
+        offset=upload.offset,
+        expires_at=upload.expires_at,
+    )
+
+
+def _discard(session: Session, upload: UploadSession) -> None:
+    _staging_path(upload).unlink(missing_ok=True)
+    session.delete(upload)
+    session.commit()
+
+
+def _get_owned(session: Session, upload_id: str, user: User) -> UploadSession:
+    upload = session.get(UploadSession, upload_id)
+    if not upload or upload.user_id != user.id or upload.expires_at < datetime.utcnow():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+    return upload
+
+
+def cleanup_expired_sessions(session: Session) -> int:
+    """Delete expired upload sessions and their staged bytes; returns how many were removed."""
+    expired = session.exec(select(UploadSession).where(UploadSession.expires_at < datetime.utcnow())).all()
+    for upload in expired:
+        _staging_path(upload).unlink(missing_ok=True)
+        session.delete(upload)
+    session.commit()
+
+    # Chunks of requests that died mid-way and staging files of sessions removed meanwhile
+    cutoff = time.time() - settings.RESUMABLE_UPLOAD_EXPIRY_HOURS * 3600
+    for path in get_staging_dir().iterdir():
+        try:
+            modified = path.stat().st_mtime
+        except FileNotFoundError:
+            # Completed or aborted while the directory was being listed
+            continue
+        if modified < cutoff and session.get(UploadSession, path.name.split(".")[0]) is None:
+            path.unlink(missing_ok=True)
+    return len(expired)
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _parse_checksum(header: str) -> bytes:
+    """Digest from an Upload-Checksum header ("sha256 <base64 digest>")."""
+    algorithm, _, encoded = header.strip().partition(" ")
+    if algorithm.lower() != "sha256":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Upload-Checksum must use sha256")
+    try:
+        return base64.b64decode(encoded.strip(), validate=True)
+    except binascii.Error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Upload-Checksum is not valid base64")
+
+
+def _advance_offset(session: Session, upload_id: str, expected: int, new_offset: int) -> bool:
+    """Move a session's offset from `expected` to `new_offset`; False if another request got there first."""
+    result = session.exec(
+        update(UploadSession)
+        .where(UploadSession.id == upload_id, UploadSession.offset == expected)
+        .values(offset=new_offset, expires_at=_new_expiry())
+    )
+    session.commit()
+    return result.rowcount == 1
+
+
+def _current(session: Session, upload_id: str) -> UploadSession:
+    """Reload a session after a conditional update; 404 if it was deleted meanwhile."""
+    upload = session.get(UploadSession, upload_id, populate_existing=True)
+    if upload is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+    return upload
+
+
+def _write_at(path: Path, offset: int, chunk_path: Path) -> None:
+    # No truncation: a later chunk may already have been written past this range
+    with open(path, "r+b") as f, open(chunk_path, "rb") as chunk:
+        f.seek(offset)
+        shutil.copyfileobj(chunk, f, 1024 * 1024)
+
+
+@router.post("", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_upload_session(
+    data: UploadSessionCreate,
+    response: Response,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Start a resumable upload. Send the bytes with PATCH to the returned upload_url."""
+    file_ext = os.path.splitext(data.filename)[1].lower()
+    if file_ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
+        )
+    if data.length > settings.RESUMABLE_UPLOAD_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File too large. Maximum size: {settings.RESUMABLE_UPLOAD_MAX_SIZE // 1024 // 1024}MB"
+        )
+
+    cleanup_expired_sessions(session)
+
+    upload = UploadSession(
+        user_id=current_user.id,
+        note_id=data.note_id,
+        filename=os.path.basename(data.filename),
+        file_ext=file_ext,
+        length=data.length,
+        sha256=data.sha256.lower(),
+        expires_at=_new_expiry(),
+    )
+    session.add(upload)
+    session.commit()
+    session.refresh(upload)
+    _staging_path(upload).touch()
+
+    response.headers.update(_progress_headers(upload))
+    response.headers["Location"] = f"/upload/sessions/{upload.id}"
+    return _to_response(upload)
+
+
+@router.head("/{upload_id}")
+async def get_upload_offset(
+    upload_id: str,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Report how many bytes have been received (Upload-Offset header)."""
+    upload = _get_owned(session, upload_id, current_user)
+    return Response(status_code=status.HTTP_200_OK, headers=_progress_headers(upload))
+
+
+@router.patch("/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def append_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    upload_checksum: Optional[str] = Header(None, alias="Upload-Checksum"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Append the request body to the upload, starting at Upload-Offset.
+    With Upload-Checksum, a chunk whose sha256 does not match is rejected (460).
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type != CHUNK_CONTENT_TYPE:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Content-Type must be {CHUNK_CONTENT_TYPE}"
+        )
+    expected_digest = _parse_checksum(upload_checksum) if upload_checksum else None
+    upload = _get_owned(session, upload_id, current_user)
+
+    path = _staging_path(upload)
+    staged = path.stat().st_size if path.exists() else 0
+    if staged < upload.offset:
+        # Staged bytes went missing; the client has to resume from what is really there
+        path.touch(exist_ok=True)
+        _advance_offset(session, upload.id, upload.offset, staged)
+        upload = _current(session, upload_id)
+    if upload_offset != upload.offset:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload-Offset does not match the bytes received",
+            headers=_progress_headers(upload),
+        )
+
+    limit = min(upload.length - upload.offset, settings.RESUMABLE_CHUNK_MAX_SIZE)
+    chunk_path = get_staging_dir() / f"{upload.id}.{uuid.uuid4().hex}.chunk"
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        with open(chunk_path, "wb") as f:
+            try:
+                async for chunk in request.stream():
+                    if written + len(chunk) > limit:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail="Chunk exceeds the upload length or the maximum chunk size",
+                            headers=_progress_headers(upload),
+                        )
+                    f.write(chunk)
+                    digest.update(chunk)
+                    written += len(chunk)
+            except ClientDisconnect:
+                # Keep what arrived; the client resumes from the new offset
+                pass
+
+        if expected_digest is not None and digest.digest() != expected_digest:
+            raise HTTPException(
+                status_code=HTTP_460_CHECKSUM_MISMATCH,
+                detail="Upload-Checksum does not match the chunk",
+                headers=_progress_headers(upload),
+            )
+
+        if written:
+            # Claim the byte range; of concurrent PATCHes at this offset only one succeeds
+            if not _advance_offset(session, upload_id, upload_offset, upload_offset + written):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Another chunk was uploaded at this offset",
+                    headers=_progress_headers(_current(session, upload_id)),
+                )
+            try:
+                await run_in_threadpool(_write_at, path, upload_offset, chunk_path)
+            except FileNotFoundError:
+                # Aborted while this chunk was being received
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+    finally:
+        chunk_path.unlink(missing_ok=True)
+
+    return Response(status_code=status.HTTP_204_NO_CONTENT, headers=_progress_headers(_current(session, upload_id)))
+
+
+@router.post("/{upload_id}/complete", response_model=dict)
+async def complete_upload(
+    upload_id: str,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Finish an upload: check that every byte arrived and matches the
+    checksum given at creation, then publish the file and attach it to the note.
+    """
+    upload = _get_owned(session, upload_id, current_user)
+    path = _staging_path(upload)
+    if upload.offset != upload.length or not path.exists() or path.stat().st_size != upload.length:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is not complete",
+            headers=_progress_headers(upload),
+        )
+    length, file_ext, note_id = upload.length, upload.file_ext, upload.note_id
+
+    with span("upload.finalize", **{"file.size": length, "file.extension": file_ext}):
+        checksum = await run_in_threadpool(_sha256, path)
+        if checksum != upload.sha256:
+            _discard(session, upload)
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Checksum mismatch, the file has to be uploaded again"
+            )
+
+        # Claim the session, so a concurrent complete or abort cannot publish it as well
+        result = session.exec(
+            delete(UploadSession).where(UploadSession.id == upload_id, UploadSession.offset == length)
+        )
+        session.commit()
+        if result.rowcount != 1:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+
+        safe_filename = new_upload_filename(file_ext)
+        try:
+            # Local storage moves the file; S3 sends it as a parallel multipart upload
+            await run_in_threadpool(get_storage().save_file, safe_filename, path, True)
+        finally:
+            path.unlink(missing_ok=True)
+    image_utils.schedule_variants(safe_filename)
+
+    file_url = f"/uploads/{safe_filename}"
+    attach_to_note(session, note_id, current_user, file_url)
+
+    return {
+        "message": "File uploaded successfully",
+        "file_url": file_url,
+        "filename": safe_filename,
+        "sha256": checksum
+    }
+
+
+@router.delete("/{upload_id}", response_model=MessageResponse)
+async def abort_upload(
+    upload_id: str,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Abandon an upload and delete its staged bytes."""
+    upload = _get_owned(session, upload_id, current_user)
+    _discard(session, upload)
+    return MessageResponse(message="Upload cancelled")
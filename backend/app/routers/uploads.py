@@ -1,30 +1,67 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Request
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
 from sqlmodel import Session
+import mimetypes
 import os
 import uuid
 from datetime import datetime
-from pathlib import Path
+from typing import Optional
 
 from app.database import get_session
 from app.models import Note, User
 from app.schemas import MessageResponse
+from app.routers.notes import notes_flight
 from app.auth_utils import get_current_active_user
 from app.config import get_settings
+from app.tracing import span
+from app.storage import get_storage
+from app import image_utils
 
 settings = get_settings()
 router = APIRouter(prefix="/upload", tags=["File Uploads"])
+# Serves /uploads/{filename}; included before the static /uploads mount (local storage)
+download_router = APIRouter(tags=["File Uploads"])
 
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {".pdf", ".png", ".jpg", ".jpeg", ".gif", ".webp"}
 
 
-def get_upload_dir() -> Path:
-    """Ensure upload directory exists and return path."""
-    # Use Path for cross-platform compatibility
-    app_dir = Path(__file__).parent.parent
-    upload_path = app_dir / settings.UPLOAD_DIR
-    upload_path.mkdir(parents=True, exist_ok=True)
-    return upload_path
+def new_upload_filename(file_ext: str) -> str:
+    """Unique name for an uploaded file."""
+    unique_id = str(uuid.uuid4())[:8]
+    timestamp = datetime.now().strftime("%Y%m%d")
+    return f"{timestamp}_{unique_id}{file_ext}"
+
+
+def save_upload(content: bytes, file_ext: str) -> str:
+    """Save file bytes under a unique name and return that name."""
+    safe_filename = new_upload_filename(file_ext)
+    
+    with span("upload.write", **{"file.size": len(content), "file.extension": file_ext}):
+        get_storage().save(safe_filename, content)
+    
+    # Responsive WebP/AVIF variants are built in the background
+    image_utils.schedule_variants(safe_filename)
+    
+    return safe_filename
+
+
+def delete_upload(filename: str) -> bool:
+    """Delete an uploaded file and its image variants; False if it did not exist."""
+    deleted = get_storage().delete(filename)
+    image_utils.delete_variants(filename)
+    return deleted
+
+
+def attach_to_note(session: Session, note_id: Optional[int], user: User, file_url: str) -> None:
+    """Set a note's file_url if the note exists and belongs to the user."""
+    if note_id:
+        note = session.get(Note, note_id)
+        if note and note.author_id == user.id:
+            note.file_url = file_url
+            session.add(note)
+            session.commit()
+            notes_flight.invalidate()
 
 
 @router.post("", response_model=dict)
@@ -61,27 +98,11 @@ async def upload_file(
             detail=f"File too large. Maximum size: {settings.MAX_UPLOAD_SIZE // 1024 // 1024}MB"
         )
     
-    # Generate unique filename
-    unique_id = str(uuid.uuid4())[:8]
-    timestamp = datetime.now().strftime("%Y%m%d")
-    safe_filename = f"{timestamp}_{unique_id}{file_ext}"
-    
-    # Save file using Path for cross-platform compatibility
-    upload_dir = get_upload_dir()
-    file_path = upload_dir / safe_filename
-    
-    with open(file_path, "wb") as f:
-        f.write(content)
-    
+    safe_filename = save_upload(content, file_ext)
     file_url = f"/uploads/{safe_filename}"
     
     # If note_id provided, update the note
-    if note_id:
-        note = session.get(Note, note_id)
-        if note and note.author_id == current_user.id:
-            note.file_url = file_url
-            session.add(note)
-            session.commit()
+    attach_to_note(session, note_id, current_user, file_url)
     
     return {
         "message": "File uploaded successfully",
@@ -90,6 +111,16 @@ async def upload_file(
     }
 
 
+def _stream(storage, key: str):
+    # Closed when the client disconnects too, so the remote connection is released
+    body = storage.open(key)
+    try:
+        for block in iter(lambda: body.read(64 * 1024), b""):
+            yield block
+    finally:
+        body.close()
+
+
 @router.delete("/{filename}", response_model=MessageResponse)
 async def delete_file(
     filename: str,
@@ -105,15 +136,54 @@ async def delete_file(
     # Sanitize filename to prevent path traversal
     safe_filename = os.path.basename(filename)
     
-    upload_dir = get_upload_dir()
-    file_path = upload_dir / safe_filename
-    
-    if not file_path.exists():
+    if not delete_upload(safe_filename):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found"
         )
     
-    file_path.unlink()
-    
     return MessageResponse(message="File deleted successfully")
+
+
+@download_router.api_route("/uploads/{filename}", methods=["GET", "HEAD"], include_in_schema=False)
+async def download_file(filename: str, request: Request):
+    """
+    Serve an uploaded file. Images are served as the best prepared variant
+    for the client's Accept header and Width / Viewport-Width / DPR hints.
+    With S3 storage the client is redirected to a presigned URL.
+    """
+    storage = get_storage()
+    key = os.path.basename(filename)
+
+    headers = {"Cache-Control": "public, max-age=86400"}
+    if os.path.splitext(key)[1].lower() in image_utils.IMAGE_EXTENSIONS:
+        headers["Vary"] = "Accept, Width, Viewport-Width, DPR"
+        headers["Accept-CH"] = "Width, Viewport-Width, DPR"
+        key = image_utils.choose_variant(
+            key, request.headers.get("accept", ""), image_utils.requested_width(request.headers)
+        ) or key
+
+    stored = storage.stat(key)
+    if stored is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+
+    if settings.S3_PRESIGNED_DOWNLOADS:
+        url = storage.presigned_url(key, settings.S3_PRESIGN_EXPIRY)
+        if url is not None:
+            # The redirect must not outlive the signature
+            headers["Cache-Control"] = f"private, max-age={settings.S3_PRESIGN_EXPIRY // 2}"
+            return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT, headers=headers)
+
+    headers["ETag"] = f'"{int(stored.modified)}-{stored.size}-{os.path.basename(key)}"'
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    path = storage.local_path(key)
+    if path is not None:
+        return FileResponse(path, headers=headers)
+    headers["Content-Length"] = str(stored.size)
+    return StreamingResponse(
+        _stream(storage, key),
+        media_type=mimetypes.guess_type(key)[0] or "application/octet-stream",
+        headers=headers,
+    )
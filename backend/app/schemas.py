@@ -1,7 +1,9 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from typing import Optional, List, Tuple, Union
 from datetime import datetime
 
+from app.content_compression import decompress_text
+
 
 # ============ Auth Schemas ============
 
@@ -109,6 +111,12 @@ class NoteResponse(NoteBase):
     view_count: int
     created_at: datetime
     updated_at: datetime
+
+    @field_validator("content", mode="before")
+    @classmethod
+    def decompress_content(cls, value):
+        # Note.content is read from the database still compressed
+        return decompress_text(value)
     
     class Config:
         from_attributes = True
@@ -122,13 +130,120 @@ class NoteListResponse(BaseModel):
     per_page: int
 
 
+class NoteBatchRequest(BaseModel):
+    """Schema for fetching several notes by id."""
+    ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+
+class NoteBatchResponse(BaseModel):
+    """Schema for a batch of notes, in requested order."""
+    notes: List[NoteResponse]
+    missing: List[int]
+
+
+class ImportRowError(BaseModel):
+    """Schema for a rejected row in a bulk import."""
+    row: int
+    error: str
+
+
+class NoteImportResponse(BaseModel):
+    """Schema for a bulk note import report."""
+    imported: int
+    failed: int
+    errors: List[ImportRowError]
+
+
+# ============ Feed Schemas ============
+
+class SubjectWithCount(SubjectResponse):
+    """Schema for a subject with its number of published notes."""
+    note_count: int = 0
+
+
+class HomeFeedResponse(BaseModel):
+    """Schema for the aggregated home page feed."""
+    subjects: List[SubjectWithCount]
+    recent_notes: List[NoteResponse]
+
+
+class DashboardFeedResponse(BaseModel):
+    """Schema for the aggregated user dashboard feed."""
+    my_notes: List[NoteResponse]
+    recent_notes: List[NoteResponse]
+
+
+# ============ Sync Schemas ============
+
+class SyncResponse(BaseModel):
+    """Schema for a delta sync page."""
+    notes: List[NoteResponse]  # Created or updated (published only)
+    subjects: List[SubjectResponse]  # Created or updated (active only)
+    deleted_note_ids: List[int]  # Deleted or unpublished
+    deleted_subject_ids: List[int]  # Deleted or deactivated
+    next_token: int
+    has_more: bool
+    snapshot_after: Optional[int] = None  # Last note id of a snapshot page; pass it back to continue
+
+
 # ============ Search Schemas ============
 
+class SearchHit(BaseModel):
+    """Schema for a single search result with a highlighted snippet."""
+    id: int
+    title: str
+    topic: Optional[str]
+    subject_id: int
+    author_id: int
+    file_url: Optional[str]
+    is_published: bool
+    view_count: int
+    created_at: datetime
+    updated_at: datetime
+    snippet: str
+    highlights: List[Tuple[int, int]]  # (start, end) offsets into snippet
+    content: Optional[str] = None  # Only included when include_content=true
+
+
+class FacetCount(BaseModel):
+    """Schema for a single facet value and its result count."""
+    value: Union[int, str]
+    count: int
+
+
+class SearchFacets(BaseModel):
+    """Schema for search result counts per facet."""
+    subject_id: List[FacetCount]
+    exam_type: List[FacetCount]
+    topic: List[FacetCount]
+
+
 class SearchResponse(BaseModel):
     """Schema for search results."""
-    notes: List[NoteResponse]
+    notes: List[SearchHit]
     total: int
     query: str
+    facets: Optional[SearchFacets] = None
+
+
+# ============ Upload Schemas ============
+
+class UploadSessionCreate(BaseModel):
+    """Schema for starting a resumable upload."""
+    filename: str = Field(..., min_length=1, max_length=255)
+    length: int = Field(..., gt=0, description="Total file size in bytes")
+    note_id: Optional[int] = None
+    sha256: str = Field(..., pattern="^[0-9a-fA-F]{64}$", description="Checksum of the whole file, verified on finalize")
+
+
+class UploadSessionResponse(BaseModel):
+    """Schema for a resumable upload session."""
+    id: str
+    upload_url: str
+    filename: str
+    length: int
+    offset: int
+    expires_at: datetime
 
 
 # ============ Message Schemas ============
@@ -0,0 +1,231 @@
+"""
+Search helpers: trigram-based fuzzy matching and highlighted result snippets.
+
+Postgres deployments use pg_trgm GIN indexes (see database.create_search_indexes).
+SQLite/dev deployments use the in-process TrigramIndex below, which keeps
+trigram -> term and term -> note postings so fuzzy lookups only touch the
+candidates that share trigrams with the query instead of scanning every note.
+"""
+import heapq
+import re
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlmodel import Session, select, func
+
+from app.content_compression import decompress_text
+from app.models import Note
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text into lowercase words (at least 2 characters)."""
+    if not text:
+        return []
+    return [w for w in _WORD_RE.findall(text.lower()) if len(w) > 1]
+
+
+def trigrams(word: str) -> Set[str]:
+    """Trigrams of a word, padded the same way pg_trgm pads them."""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a: str, b: str) -> float:
+    """Trigram similarity between two words (0.0 - 1.0)."""
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    shared = len(ta & tb)
+    return shared / (len(ta) + len(tb) - shared)
+
+
+class TrigramIndex:
+    """In-memory trigram postings index over note titles, topics and content."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._signature: Optional[Tuple] = None
+        self._synced_at: Optional[datetime] = None
+        self._trigram_terms: Dict[str, Set[str]] = defaultdict(set)
+        self._term_notes: Dict[str, Set[int]] = defaultdict(set)
+        self._term_size: Dict[str, int] = {}
+        self._note_terms: Dict[int, Set[str]] = {}
+
+    def _current_signature(self, session: Session) -> Tuple:
+        return tuple(session.exec(
+            select(func.count(Note.id), func.max(Note.updated_at))
+        ).one())
+
+    def ensure_fresh(self, session: Session) -> None:
+        """Bring the index up to date with notes added, edited or removed since the last call."""
+        signature = self._current_signature(session)
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature != self._signature:
+                self._sync(session, signature[0])
+                self._signature = signature
+
+    def _sync(self, session: Session, count: int) -> None:
+        # Only notes touched since the last sync are re-indexed (>= because timestamps can tie)
+        query = select(Note.id, Note.title, Note.topic, Note.content, Note.updated_at)
+        if self._synced_at is not None:
+            query = query.where(Note.updated_at >= self._synced_at)
+        for note_id, title, topic, content, updated_at in session.exec(query.execution_options(yield_per=500)):
+            self._remove(note_id)
+            self._add(note_id, set(tokenize(title) + tokenize(topic) + tokenize(decompress_text(content))))
+            if self._synced_at is None or updated_at > self._synced_at:
+                self._synced_at = updated_at
+
+        if len(self._note_terms) != count:
+            # Notes were deleted; drop their postings
+            existing = set(session.exec(select(Note.id)).all())
+            for note_id in [n for n in self._note_terms if n not in existing]:
+                self._remove(note_id)
+
+    def _add(self, note_id: int, terms: Set[str]) -> None:
+        self._note_terms[note_id] = terms
+        for term in terms:
+            self._term_notes[term].add(note_id)
+            if term not in self._term_size:
+                grams = trigrams(term)
+                self._term_size[term] = len(grams)
+                for gram in grams:
+                    self._trigram_terms[gram].add(term)
+
+    def _remove(self, note_id: int) -> None:
+        for term in self._note_terms.pop(note_id, ()):
+            notes = self._term_notes[term]
+            notes.discard(note_id)
+            if notes:
+                continue
+            del self._term_notes[term]
+            del self._term_size[term]
+            for gram in trigrams(term):
+                terms = self._trigram_terms[gram]
+                terms.discard(term)
+                if not terms:
+                    del self._trigram_terms[gram]
+
+    def _similar_terms(self, word: str, threshold: float, max_terms: int) -> Dict[str, float]:
+        grams = trigrams(word)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._trigram_terms.get(gram, ()))
+
+        matches = {}
+        for term, count in heapq.nlargest(max_terms, shared.items(), key=lambda kv: kv[1]):
+            score = count / (len(grams) + self._term_size[term] - count)
+            if score >= threshold:
+                matches[term] = score
+        return matches
+
+    def lookup(
+        self,
+        query: str,
+        threshold: float = 0.3,
+        max_terms: int = 50,
+    ) -> List[Tuple[int, float, List[str]]]:
+        """
+        Find notes containing words similar to the query words.
+        Returns (note_id, score, matched_terms) tuples, best first. Every
+        matching note is returned so callers can filter before truncating.
+        """
+        scores: Dict[int, float] = defaultdict(float)
+        matched: Dict[int, List[str]] = defaultdict(list)
+
+        with self._lock:
+            for word in set(tokenize(query)):
+                best_per_note: Dict[int, float] = {}
+                for term, score in self._similar_terms(word, threshold, max_terms).items():
+                    for note_id in self._term_notes.get(term, ()):
+                        if score > best_per_note.get(note_id, 0.0):
+                            best_per_note[note_id] = score
+                        matched[note_id].append(term)
+                for note_id, score in best_per_note.items():
+                    scores[note_id] += score
+
+        best = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+        return [(note_id, score, matched[note_id]) for note_id, score in best]
+
+
+# Shared index used by the search router on non-Postgres databases
+note_index = TrigramIndex()
+
+
+def _fuzzy_terms(text: str, words: List[str], threshold: float) -> Set[str]:
+    """Words in text that are trigram-similar to any of the query words."""
+    found = set()
+    for term in set(tokenize(text)):
+        if any(similarity(term, word) >= threshold for word in words):
+            found.add(term)
+    return found
+
+
+def make_snippet(
+    text: str,
+    query: str,
+    width: int = 200,
+    fuzzy_threshold: float = 0.3,
+) -> Tuple[str, List[Tuple[int, int]]]:
+    """
+    Build a snippet of roughly `width` characters around the densest cluster of
+    query terms, plus (start, end) highlight offsets relative to the snippet.
+    Falls back to typo-tolerant term matching when no query word occurs verbatim.
+    """
+    words = tokenize(query)
+    spans = _find_spans(text, set(words))
+    if not spans and words:
+        spans = _find_spans(text, _fuzzy_terms(text, words, fuzzy_threshold))
+
+    if not spans:
+        snippet = text[:width]
+        return (snippet + "…" if len(text) > width else snippet), []
+
+    # Pick the window with the most distinct terms (then most hits)
+    best_i, best_j, best_score = 0, 0, (0, 0)
+    j = 0
+    for i, (start, _, _) in enumerate(spans):
+        j = max(j, i)
+        while j + 1 < len(spans) and spans[j + 1][1] - start <= width:
+            j += 1
+        window = spans[i:j + 1]
+        score = (len({term for _, _, term in window}), len(window))
+        if score > best_score:
+            best_i, best_j, best_score = i, j, score
+
+    # Center the matched region inside the window and snap to word boundaries
+    first, last = spans[best_i][0], spans[best_j][1]
+    start = max(0, first - (width - (last - first)) // 2)
+    end = min(len(text), start + width)
+    start = max(0, end - width)
+    if start > 0:
+        space = text.find(" ", start, first)
+        start = space + 1 if space != -1 else start
+    if end < len(text):
+        space = text.rfind(" ", last, end)
+        end = space if space != -1 else end
+
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(text) else ""
+    offset = len(prefix) - start
+    highlights = [
+        (s + offset, e + offset)
+        for s, e, _ in spans[best_i:]
+        if s >= start and e <= end
+    ]
+    return prefix + text[start:end] + suffix, highlights
+
+
+def _find_spans(text: str, terms: Set[str]) -> List[Tuple[int, int, str]]:
+    """(start, end, term) offsets of every occurrence of the terms in text."""
+    if not terms:
+        return []
+    # Longest terms first so overlapping alternatives prefer the longer match
+    alternatives = sorted(terms, key=len, reverse=True)
+    pattern = re.compile("|".join(re.escape(t) for t in alternatives), re.IGNORECASE)
+    return [(m.start(), m.end(), m.group(0).lower()) for m in pattern.finditer(text)]
@@ -0,0 +1,35 @@
+"""
+SQLite production profile: connection pragmas.
+
+Every SQLite connection is switched to WAL with synchronous=NORMAL, a busy
+timeout, a larger page cache and memory-mapped I/O, so readers never block
+behind a writer. Hot small writes (view counts) go through the single
+BatchWriter connection (see app.batch_writer) instead of every request
+contending for the database write lock.
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+def install_pragmas(engine: Engine) -> None:
+    """Apply the tuned pragmas to every new SQLite connection of an engine."""
+    in_memory = engine.url.database in (None, "", ":memory:")
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            if not in_memory:
+                cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+            # Negative cache_size is in KiB
+            cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+            cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+        finally:
+            cursor.close()
@@ -0,0 +1,210 @@
+"""
+Cold-start instrumentation.
+
+At boot the app records how long each startup phase took (interpreter and
+server start, importing app.main, each lifespan step) and how long after
+process start the first response was sent, and prints one summary line each.
+
+Run from the backend directory for an import-time breakdown and a measured
+time-to-first-response in a fresh process:
+    python -m app.startup [--top 25] [--runs 3]
+Exits with status 1 when time-to-first-response exceeds STARTUP_TARGET_MS.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, List, Optional, Tuple
+
+
+def _process_start_time() -> float:
+    """Wall-clock time the current process started (Linux), else now."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Field 22 (after the parenthesised command name) is the start time in clock ticks since boot
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/stat") as f:
+            boot_time = next(int(line.split()[1]) for line in f if line.startswith("btime"))
+        return boot_time + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration, AttributeError):
+        return time.time()
+
+
+class StartupTimer:
+    """Records consecutive startup phases and the first response."""
+
+    def __init__(self):
+        self.process_started = _process_start_time()
+        self.phases: List[Tuple[str, float]] = []
+        self.first_response_ms: Optional[float] = None
+        self._last_mark = time.time()
+        # Everything before this module was imported: interpreter, server and framework startup
+        self.phases.append(("process", max(0.0, self._last_mark - self.process_started)))
+
+    def mark(self, name: str) -> None:
+        """Record the time since the previous mark as phase `name`."""
+        now = time.time()
+        self.phases.append((name, now - self._last_mark))
+        self._last_mark = now
+
+    @contextmanager
+    def phase(self, name: str):
+        self._last_mark = time.time()
+        try:
+            yield
+        finally:
+            self.mark(name)
+
+    def summary(self) -> str:
+        parts = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.phases)
+        total = (time.time() - self.process_started) * 1000
+        return f"{parts} (ready {total:.0f}ms after process start)"
+
+    def record_first_response(self) -> float:
+        self.first_response_ms = (time.time() - self.process_started) * 1000
+        return self.first_response_ms
+
+
+timer = StartupTimer()
+
+
+def warm_up_lazy_modules() -> None:
+    """
+    Load the lazily imported auth and email modules in the background. Started
+    after the first response, so the warm-up (bcrypt in particular) does not
+    compete with it.
+    """
+    def load():
+        try:
+            from app.auth_utils import get_pwd_context
+            from app.email_utils import get_resend
+            import jose.jwt  # noqa: F401
+            get_pwd_context().hash("warm-up")
+            get_resend()
+        except Exception as e:
+            print(f"Lazy module warm-up failed: {e}")
+
+    # Not a daemon (which it would inherit when started from a worker thread): killing it
+    # mid-import or mid-hash at interpreter exit aborts the thread
+    threading.Thread(target=load, name="warm-up", daemon=False).start()
+
+
+class FirstResponseMiddleware:
+    """ASGI middleware reporting time-to-first-response once, then passing requests straight through."""
+
+    def __init__(self, app, target_ms: int, on_first_response: Optional[Callable[[], None]] = None):
+        self.app = app
+        self.target_ms = target_ms
+        self.on_first_response = on_first_response
+        self.done = False
+
+    async def __call__(self, scope, receive, send):
+        if self.done or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if not self.done:
+                self.done = True
+                elapsed = timer.record_first_response()
+                flag = "⚡" if elapsed <= self.target_ms else "⚠️"
+                print(f"{flag} First response {elapsed:.0f}ms after process start (target {self.target_ms}ms)")
+                if self.on_first_response is not None:
+                    self.on_first_response()
+
+
+# Import-time breakdown (CLI)
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|\s*(\S+)")
+
+
+def import_breakdown(module: str = "app.main") -> List[Tuple[str, float, float]]:
+    """
+    Import `module` in a fresh interpreter with -X importtime and return
+    (package, self_ms, cumulative_ms) per top-level package, slowest first.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "import failed")
+
+    self_us = defaultdict(int)
+    cumulative_us = defaultdict(int)
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        own, cumulative, name = match.groups()
+        # app modules are reported individually, third-party ones per package
+        package = name if name.startswith("app.") or name == "app" else name.split(".")[0]
+        self_us[package] += int(own)
+        # The package's own entry carries its cumulative time
+        if name == package:
+            cumulative_us[package] = max(cumulative_us[package], int(cumulative))
+    rows = [(pkg, self_us[pkg] / 1000, max(cumulative_us[pkg], self_us[pkg]) / 1000) for pkg in self_us]
+    return sorted(rows, key=lambda row: row[1], reverse=True)
+
+
+_FIRST_RESPONSE_SCRIPT = """
+import asyncio
+import httpx
+from app.main import app
+async def main():
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            (await client.get("/health")).raise_for_status()
+asyncio.run(main())
+"""
+
+
+def measure_first_response() -> float:
+    """Milliseconds from interpreter start to the first /health response, in a fresh process."""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", _FIRST_RESPONSE_SCRIPT],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "startup failed")
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    from app.config import get_settings
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Profile cold start of app.main")
+    parser.add_argument("--top", type=int, default=25, help="Number of packages to list")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh-process startups to measure")
+    parser.add_argument("--target-ms", type=int, default=settings.STARTUP_TARGET_MS)
+    args = parser.parse_args()
+
+    print("\n📦 Import-time breakdown (self time, fresh interpreter)...\n")
+    rows = import_breakdown()
+    print(f"{'module':<40}{'self ms':>10}{'cumulative ms':>16}")
+    for package, own, cumulative in rows[:args.top]:
+        print(f"{package:<40}{own:>10.1f}{cumulative:>16.1f}")
+    print(f"{'total':<40}{sum(row[1] for row in rows):>10.1f}")
+
+    print(f"\n⏱  Time to first response ({args.runs} runs)...\n")
+    timings = sorted(measure_first_response() for _ in range(args.runs))
+    for timing in timings:
+        print(f"  {timing:.0f}ms")
+    median = timings[len(timings) // 2]
+
+    if median > args.target_ms:
+        print(f"\n❌ Median {median:.0f}ms exceeds target {args.target_ms}ms\n")
+        sys.exit(1)
+    print(f"\n✅ Median {median:.0f}ms within target {args.target_ms}ms\n")
+
+
+if __name__ == "__main__":
+    main()
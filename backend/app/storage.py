@@ -0,0 +1,379 @@
+"""
+Storage backends for uploaded files.
+
+Uploads are addressed by key: the file name for originals
+("20250101_ab12cd34.pdf") and "variants/<name>/<file>" for image variants.
+STORAGE_BACKEND selects where they live:
+
+    local  files under UPLOAD_DIR (default)
+    s3     an S3-compatible bucket (AWS S3, MinIO, ...); needs the optional boto3 package
+
+With S3, large files are sent as parallel multipart uploads and downloads
+are redirected to short-lived presigned URLs, so file bytes do not pass
+through the API process.
+
+Move existing files between backends, from the backend directory:
+    python -m app.storage --from local --to s3 [--delete-source]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, NamedTuple, Optional
+
+from app.config import get_settings
+
+settings = get_settings()
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class StoredFile(NamedTuple):
+    key: str
+    size: int
+    modified: float  # Unix timestamp
+
+
+class StorageBackend(ABC):
+    """Where uploaded files are kept."""
+
+    name = ""
+
+    @abstractmethod
+    def save(self, key: str, data: bytes) -> None:
+        """Store bytes under a key, replacing any existing file."""
+
+    @abstractmethod
+    def save_file(self, key: str, path: Path, move: bool = False) -> None:
+        """Store a local file under a key; with move=True the local file is consumed."""
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        """Open a stored file for reading (the caller closes it). Raises FileNotFoundError."""
+
+    @abstractmethod
+    def stat(self, key: str) -> Optional[StoredFile]:
+        """Size and modification time of a stored file, or None if it does not exist."""
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Delete a stored file; returns False if it did not exist."""
+
+    @abstractmethod
+    def list(self, prefix: str = "") -> Iterator[StoredFile]:
+        """Iterate over stored files whose key starts with prefix."""
+
+    def read(self, key: str) -> bytes:
+        with self.open(key) as f:
+            return f.read()
+
+    def move(self, key: str, new_key: str) -> None:
+        """Store a file under a new key and remove the old one."""
+        with self.local_copy(key) as path:
+            self.save_file(new_key, path)
+        self.delete(key)
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Path of the file on this node's disk, if the backend keeps files there."""
+        return None
+
+    def presigned_url(self, key: str, expires: int) -> Optional[str]:
+        """Time-limited URL the client can download the file from directly, if supported."""
+        return None
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[Path]:
+        """A local file with the stored bytes, for code that needs a real path."""
+        path = self.local_path(key)
+        if path is not None:
+            yield path
+            return
+        suffix = os.path.splitext(key)[1]
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as temp:
+            with self.open(key) as source:
+                shutil.copyfileobj(source, temp, COPY_BUFFER_SIZE)
+        try:
+            yield Path(temp.name)
+        finally:
+            os.unlink(temp.name)
+
+
+class LocalStorage(StorageBackend):
+    """Files in a directory on this node."""
+
+    name = "local"
+
+    def __init__(self, root: Path):
+        root.mkdir(parents=True, exist_ok=True)
+        self.root = root.resolve()
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root not in path.parents:
+            raise ValueError(f"Invalid storage key {key!r}")
+        return path
+
+    def save(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp = path.with_name(path.name + ".tmp")
+        with open(temp, "wb") as f:
+            f.write(data)
+        os.replace(temp, path)
+
+    def save_file(self, key: str, path: Path, move: bool = False) -> None:
+        target = self._path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if move:
+            shutil.move(str(path), str(target))
+        else:
+            temp = target.with_name(target.name + ".tmp")
+            shutil.copyfile(path, temp)
+            os.replace(temp, target)
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self._path(key), "rb")
+
+    def stat(self, key: str) -> Optional[StoredFile]:
+        try:
+            result = self._path(key).stat()
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        return StoredFile(key, result.st_size, result.st_mtime)
+
+    def delete(self, key: str) -> bool:
+        path = self._path(key)
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            return False
+        # Remove directories left empty (e.g. variants/<name>/)
+        self._delete_empty_parents(path)
+        return True
+
+    def list(self, prefix: str = "") -> Iterator[StoredFile]:
+        # os.walk streams directory by directory instead of collecting every path
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith(".tmp"):
+                    continue
+                path = Path(directory) / filename
+                key = path.relative_to(self.root).as_posix()
+                if key.startswith(prefix):
+                    result = path.stat()
+                    yield StoredFile(key, result.st_size, result.st_mtime)
+
+    def move(self, key: str, new_key: str) -> None:
+        target = self._path(new_key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(self._path(key), target)
+        self._delete_empty_parents(self._path(key))
+
+    def _delete_empty_parents(self, path: Path) -> None:
+        for parent in path.parents:
+            if parent == self.root:
+                break
+            try:
+                parent.rmdir()
+            except OSError:
+                break
+
+    def local_path(self, key: str) -> Optional[Path]:
+        return self._path(key)
+
+
+class S3Storage(StorageBackend):
+    """Files in an S3-compatible bucket under a key prefix."""
+
+    name = "s3"
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None,
+                 region: Optional[str] = None, access_key_id: Optional[str] = None,
+                 secret_access_key: Optional[str] = None):
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self._client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url or None,
+            region_name=region or None,
+            aws_access_key_id=access_key_id or None,
+            aws_secret_access_key=secret_access_key or None,
+        )
+        # Files above the threshold are sent/fetched as parts in parallel threads
+        self._transfer_config = TransferConfig(
+            multipart_threshold=settings.S3_MULTIPART_THRESHOLD,
+            multipart_chunksize=settings.S3_MULTIPART_CHUNK_SIZE,
+            max_concurrency=settings.S3_MAX_CONCURRENCY,
+        )
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    def save(self, key: str, data: bytes) -> None:
+        self._client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data)
+
+    def save_file(self, key: str, path: Path, move: bool = False) -> None:
+        self._client.upload_file(str(path), self.bucket, self._key(key), Config=self._transfer_config)
+        if move:
+            os.unlink(path)
+
+    def open(self, key: str) -> BinaryIO:
+        try:
+            return self._client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"]
+        except self._client.exceptions.NoSuchKey:
+            raise FileNotFoundError(key)
+
+    def stat(self, key: str) -> Optional[StoredFile]:
+        from botocore.exceptions import ClientError
+
+        try:
+            head = self._client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return StoredFile(key, head["ContentLength"], head["LastModified"].timestamp())
+
+    def delete(self, key: str) -> bool:
+        if self.stat(key) is None:
+            return False
+        self._client.delete_object(Bucket=self.bucket, Key=self._key(key))
+        return True
+
+    def list(self, prefix: str = "") -> Iterator[StoredFile]:
+        paginator = self._client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            for item in page.get("Contents", []):
+                yield StoredFile(item["Key"][len(self.prefix):], item["Size"], item["LastModified"].timestamp())
+
+    def move(self, key: str, new_key: str) -> None:
+        # Server-side copy (multipart for large objects), no download
+        self._client.copy(
+            {"Bucket": self.bucket, "Key": self._key(key)}, self.bucket, self._key(new_key),
+            Config=self._transfer_config,
+        )
+        self._client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def presigned_url(self, key: str, expires: int) -> Optional[str]:
+        return self._client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": self._key(key)}, ExpiresIn=expires
+        )
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[Path]:
+        suffix = os.path.splitext(key)[1]
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as temp:
+            pass
+        try:
+            self._client.download_file(self.bucket, self._key(key), temp.name, Config=self._transfer_config)
+            yield Path(temp.name)
+        finally:
+            os.unlink(temp.name)
+
+
+def create_backend(name: str) -> StorageBackend:
+    """Build a storage backend from settings."""
+    if name == "local":
+        return LocalStorage(Path(__file__).parent / settings.UPLOAD_DIR)
+    if name == "s3":
+        if not settings.S3_BUCKET:
+            raise ValueError("S3_BUCKET must be set to use the s3 storage backend")
+        return S3Storage(
+            settings.S3_BUCKET,
+            prefix=settings.S3_PREFIX,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region=settings.S3_REGION,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+        )
+    raise ValueError(f"Unknown storage backend '{name}', expected 'local' or 's3'")
+
+
+_storage: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    """The configured storage backend (created on first use)."""
+    global _storage
+    if _storage is None:
+        _storage = create_backend(settings.STORAGE_BACKEND)
+    return _storage
+
+
+# Migration CLI
+def copy_file(source: StorageBackend, target: StorageBackend, key: str) -> None:
+    with source.local_copy(key) as path:
+        target.save_file(key, path)
+
+
+def migrate(source: StorageBackend, target: StorageBackend, workers: int, delete_source: bool = False) -> Dict[str, int]:
+    """Copy every file that is missing (or has a different size) in target; returns counts."""
+    stats = {"copied": 0, "skipped": 0, "failed": 0, "bytes": 0}
+
+    def transfer(stored: StoredFile) -> bool:
+        existing = target.stat(stored.key)
+        copied = existing is None or existing.size != stored.size
+        if copied:
+            copy_file(source, target, stored.key)
+        if delete_source:
+            source.delete(stored.key)
+        return copied
+
+    def collect(window) -> None:
+        for stored, future in window:
+            try:
+                copied = future.result()
+            except Exception as e:
+                stats["failed"] += 1
+                print(f"  ✗ {stored.key}: {e}")
+                continue
+            stats["copied" if copied else "skipped"] += 1
+            stats["bytes"] += stored.size if copied else 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Submitted in windows so a huge bucket is never listed into memory up front
+        window = []
+        for stored in source.list():
+            window.append((stored, pool.submit(transfer, stored)))
+            if len(window) >= workers * 4:
+                collect(window)
+                window = []
+        collect(window)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move uploaded files between storage backends")
+    parser.add_argument("--from", dest="source", required=True, choices=["local", "s3"])
+    parser.add_argument("--to", dest="target", required=True, choices=["local", "s3"])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--delete-source", action="store_true", help="Delete each file from the source once copied")
+    args = parser.parse_args()
+
+    if args.source == args.target:
+        print("✗ Source and target backends must differ")
+        sys.exit(1)
+    try:
+        source, target = create_backend(args.source), create_backend(args.target)
+    except (ValueError, ImportError) as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+    print(f"\n📦 Copying uploads from {args.source} to {args.target}...\n")
+    stats = migrate(source, target, args.workers, args.delete_source)
+    print(f"✅ Copied {stats['copied']} files ({stats['bytes'] / 1024 / 1024:.1f} MB), "
+          f"{stats['skipped']} already present, {stats['failed']} failed\n")
+    if stats["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Change tracking for delta sync.
+
+Every insert, update or delete of a Note or Subject appends a ChangeLog row.
+ChangeLog.id is the monotonic change token handed to sync clients.
+"""
+from typing import Iterable
+
+from sqlalchemy import event, inspect, insert
+from sqlalchemy.orm import Session
+
+from app.models import ChangeLog, Note, Subject
+
+# Entity type names stored in ChangeLog.entity_type
+TRACKED_ENTITIES = {Note: "note", Subject: "subject"}
+
+# Attribute changes that are not worth a sync round-trip
+IGNORED_ATTRIBUTES = {"view_count"}
+
+
+def record_changes(session: Session, entity_type: str, entity_ids: Iterable[int], operation: str) -> None:
+    """Append change entries for rows modified outside the ORM (bulk statements)."""
+    rows = [
+        {"entity_type": entity_type, "entity_id": entity_id, "operation": operation}
+        for entity_id in entity_ids
+    ]
+    if rows:
+        session.execute(insert(ChangeLog), rows)
+
+
+def _has_tracked_changes(obj) -> bool:
+    state = inspect(obj)
+    return any(
+        attr.history.has_changes()
+        for attr in state.attrs
+        if attr.key not in IGNORED_ATTRIBUTES
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flush_changes(session: Session, flush_context) -> None:
+    rows = []
+    for obj in session.new:
+        entity_type = TRACKED_ENTITIES.get(type(obj))
+        if entity_type:
+            rows.append({"entity_type": entity_type, "entity_id": obj.id, "operation": "upsert"})
+    for obj in session.dirty:
+        entity_type = TRACKED_ENTITIES.get(type(obj))
+        if entity_type and _has_tracked_changes(obj):
+            rows.append({"entity_type": entity_type, "entity_id": obj.id, "operation": "upsert"})
+    for obj in session.deleted:
+        entity_type = TRACKED_ENTITIES.get(type(obj))
+        if entity_type:
+            rows.append({"entity_type": entity_type, "entity_id": obj.id, "operation": "delete"})
+
+    if rows:
+        session.connection().execute(insert(ChangeLog), rows)
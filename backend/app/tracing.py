@@ -0,0 +1,299 @@
+"""
+Lightweight request tracing.
+
+Each HTTP request gets a trace (continuing an incoming W3C `traceparent` when
+present). Code wraps interesting work in `span("name")`; DB statements are
+traced through engine hooks. Sampled traces are written as OTLP/JSON lines
+(one ExportTraceServiceRequest per trace) to a rotating local file, so no
+collector is needed.
+"""
+import inspect
+import json
+import logging
+import os
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+class Trace:
+    """Spans collected for one request."""
+
+    def __init__(self, trace_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.spans: List["Span"] = []
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str], kind: int = SPAN_KIND_INTERNAL,
+                 attributes: Optional[Dict] = None):
+        self.trace = trace
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.status = STATUS_OK
+        self.status_message = ""
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, error: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {error}"
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.trace.spans.append(self)
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": self.status},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+
+def _otlp_attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def start_span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes) -> Optional[Span]:
+    """Start a child of the current span, or return None when the request is not sampled."""
+    trace = _current_trace.get()
+    if trace is None or not trace.sampled:
+        return None
+    parent = _current_span.get()
+    return Span(trace, name, parent.span_id if parent else None, kind, attributes)
+
+
+@contextmanager
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+    """Trace the enclosed block as a child of the current span."""
+    current = start_span(name, kind, **attributes)
+    if current is None:
+        yield None
+        return
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.set_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+
+
+def traced(name: str, kind: int = SPAN_KIND_INTERNAL):
+    """Decorator tracing every call of a sync or async function."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, kind):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def parse_traceparent(header: Optional[str]):
+    """Return (trace_id, parent_span_id, sampled) from a W3C traceparent, or None if invalid."""
+    if not header:
+        return None
+    match = _TRACEPARENT_RE.match(header.strip().lower())
+    if not match:
+        return None
+    trace_id, parent_id, flags = match.groups()
+    if trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 0x01)
+
+
+def format_traceparent(trace_id: str, span_id: str, sampled: bool) -> str:
+    return f"00-{trace_id}-{span_id}-{'01' if sampled else '00'}"
+
+
+class JsonlSpanExporter:
+    """Writes finished traces as OTLP/JSON lines to a size-rotated file."""
+
+    def __init__(self, path: str, max_bytes: int, backup_count: int, service_name: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.resource = {"attributes": [_otlp_attribute("service.name", service_name)]}
+        self._logger = logging.getLogger("app.tracing.export")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._logger.addHandler(handler)
+
+    def export(self, spans: List[Span]) -> None:
+        payload = {
+            "resourceSpans": [{
+                "resource": self.resource,
+                "scopeSpans": [{"scope": {"name": "app.tracing"}, "spans": [s.to_otlp() for s in spans]}],
+            }]
+        }
+        self._logger.info(json.dumps(payload, separators=(",", ":"), ensure_ascii=False))
+
+
+_exporter: Optional[JsonlSpanExporter] = None
+
+
+def get_exporter() -> JsonlSpanExporter:
+    global _exporter
+    if _exporter is None:
+        _exporter = JsonlSpanExporter(
+            settings.TRACE_EXPORT_PATH,
+            settings.TRACE_EXPORT_MAX_BYTES,
+            settings.TRACE_EXPORT_BACKUPS,
+            settings.APP_NAME,
+        )
+    return _exporter
+
+
+# DB statements (spans are started/ended from engine events)
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._trace_span = start_span(
+        "db.query", SPAN_KIND_CLIENT, **{"db.system": conn.dialect.name, "db.statement": statement[:1000]}
+    )
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    current = getattr(context, "_trace_span", None)
+    if current is not None:
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            current.set_attribute("db.rowcount", cursor.rowcount)
+        current.end()
+
+
+def _handle_error(exception_context):
+    current = getattr(exception_context.execution_context, "_trace_span", None)
+    if current is not None:
+        current.set_error(exception_context.original_exception)
+        current.end()
+
+
+def install(engine: Engine) -> None:
+    """Trace every statement executed on an engine."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class TracingMiddleware:
+    """ASGI middleware starting a server span per request and exporting sampled traces."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        incoming = parse_traceparent(headers.get(b"traceparent", b"").decode("latin-1"))
+        if incoming:
+            trace_id, parent_id, sampled = incoming
+        else:
+            trace_id, parent_id = _new_id(16), None
+            sampled = random.random() < settings.TRACE_SAMPLE_RATE
+
+        trace = Trace(trace_id, sampled)
+        root = Span(trace, f"{scope['method']} {scope['path']}", parent_id, SPAN_KIND_SERVER, {
+            "http.method": scope["method"],
+            "http.target": scope["path"],
+        })
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(root)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+                if message["status"] >= 500:
+                    root.status = STATUS_ERROR
+                traceparent = format_traceparent(trace_id, root.span_id, sampled)
+                message = {**message, "headers": list(message.get("headers", [])) + [
+                    (b"traceparent", traceparent.encode("latin-1"))
+                ]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            root.set_error(e)
+            raise
+        finally:
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            if sampled:
+                route = scope.get("route")
+                if route is not None and getattr(route, "path", None):
+                    root.name = f"{scope['method']} {route.path}"
+                    root.set_attribute("http.route", route.path)
+                root.end()
+                try:
+                    get_exporter().export(trace.spans)
+                except Exception as e:
+                    print(f"Trace export failed: {e}")
@@ -0,0 +1,188 @@
+"""
+Garbage collection of orphaned uploads.
+
+Uploads that no note references (uploaded without a note_id, replaced, or
+left behind by a deleted note) are found by streaming the storage listing
+and checking it against Note.file_url in batches, so neither side is loaded
+into memory whole. A file counts as referenced by "/uploads/<name>" and by
+absolute URLs containing that path. Orphans are first moved to quarantine:
+
+    quarantine/<YYYYmmddHHMMSS>/<name>
+
+and deleted on a later run once UPLOAD_GC_GRACE_DAYS have passed. Every run
+checks all of quarantine, so a file that a note references again is
+restored on the next run, whatever its age. Files
+younger than UPLOAD_GC_MIN_AGE_HOURS are left alone, since a client may
+upload first and create the note afterwards. Image variants are removed
+together with their original.
+
+Run from the backend directory (e.g. daily from cron):
+    python -m app.upload_gc [--dry-run] [--batch-size 500]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Set
+
+from sqlalchemy import or_, text
+from sqlmodel import Session, select
+
+from app.config import get_settings
+from app.image_utils import VARIANTS_DIR, delete_variants
+from app.models import Note
+from app.storage import StorageBackend, StoredFile, get_storage
+
+settings = get_settings()
+
+URL_PREFIX = "/uploads/"
+QUARANTINE_DIR = "quarantine"
+TIMESTAMP_FORMAT = "%Y%m%d%H%M%S"
+LIKE_CHUNK_SIZE = 100
+
+
+def _batches(files: Iterable[StoredFile], size: int) -> Iterator[List[StoredFile]]:
+    batch = []
+    for stored in files:
+        batch.append(stored)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def referenced_names(session: Session, names: List[str]) -> Set[str]:
+    """
+    The subset of upload names that some note's file_url points at, either
+    as "/uploads/<name>" or as an absolute URL (which may carry a query string).
+    """
+    urls = [URL_PREFIX + name for name in names]
+    rows = session.exec(select(Note.file_url).where(Note.file_url.in_(urls)).distinct()).all()
+    referenced = {url[len(URL_PREFIX):] for url in rows}
+
+    # The rest need a substring match, which no index helps with; chunked to stay within SQLite's expression depth
+    remaining = [name for name in names if name not in referenced]
+    for start in range(0, len(remaining), LIKE_CHUNK_SIZE):
+        chunk = remaining[start:start + LIKE_CHUNK_SIZE]
+        matches = or_(*(Note.file_url.contains(URL_PREFIX + name, autoescape=True) for name in chunk))
+        for url in session.exec(select(Note.file_url).where(matches).distinct()):
+            referenced.update(name for name in chunk if URL_PREFIX + name in url)
+    return referenced
+
+
+def ensure_file_url_index(engine) -> None:
+    """Index Note.file_url on databases created before it was indexed (create_all skips existing tables)."""
+    with engine.begin() as conn:
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_note_file_url ON note (file_url)"))
+
+
+def quarantine_orphans(session: Session, storage: StorageBackend, batch_size: int,
+                       dry_run: bool = False) -> Dict[str, int]:
+    """Move unreferenced uploads older than the minimum age into quarantine."""
+    stats = {"scanned": 0, "quarantined": 0, "quarantined_bytes": 0}
+    cutoff = time.time() - settings.UPLOAD_GC_MIN_AGE_HOURS * 3600
+    stamp = datetime.utcnow().strftime(TIMESTAMP_FORMAT)
+
+    # Originals live at the top level; variants and quarantine are in subdirectories
+    originals = (stored for stored in storage.list() if "/" not in stored.key)
+    for batch in _batches(originals, batch_size):
+        stats["scanned"] += len(batch)
+        candidates = [stored for stored in batch if stored.modified < cutoff]
+        if not candidates:
+            continue
+        referenced = referenced_names(session, [stored.key for stored in candidates])
+        for stored in candidates:
+            if stored.key in referenced:
+                continue
+            stats["quarantined"] += 1
+            stats["quarantined_bytes"] += stored.size
+            if not dry_run:
+                storage.move(stored.key, f"{QUARANTINE_DIR}/{stamp}/{stored.key}")
+                delete_variants(stored.key)
+    return stats
+
+
+def purge_quarantine(session: Session, storage: StorageBackend, batch_size: int,
+                     dry_run: bool = False) -> Dict[str, int]:
+    """Restore quarantined files that are referenced again; delete the rest once past the grace period."""
+    stats = {"deleted": 0, "reclaimed_bytes": 0, "restored": 0}
+    expiry = (datetime.utcnow() - timedelta(days=settings.UPLOAD_GC_GRACE_DAYS)).strftime(TIMESTAMP_FORMAT)
+
+    for batch in _batches(storage.list(QUARANTINE_DIR + "/"), batch_size):
+        names = {stored.key: stored.key.split("/", 2)[2] for stored in batch}
+        referenced = referenced_names(session, list(names.values()))
+        for stored in batch:
+            name = names[stored.key]
+            if name in referenced:
+                stats["restored"] += 1
+                if not dry_run:
+                    storage.move(stored.key, name)
+                continue
+            # Timestamps sort as strings, so expired entries are those with an older stamp
+            if stored.key.split("/")[1] >= expiry:
+                continue
+            stats["deleted"] += 1
+            stats["reclaimed_bytes"] += stored.size
+            if not dry_run:
+                storage.delete(stored.key)
+    return stats
+
+
+def delete_stray_variants(storage: StorageBackend, dry_run: bool = False) -> Dict[str, int]:
+    """Delete variants whose original no longer exists (e.g. it was quarantined or deleted)."""
+    stats = {"variant_files": 0, "variant_bytes": 0}
+    present: Dict[str, bool] = {}
+    for stored in storage.list(VARIANTS_DIR + "/"):
+        name = stored.key.split("/")[1]
+        if name not in present:
+            # Listings are grouped by variant directory, so only the current name is kept
+            present = {name: storage.stat(name) is not None}
+        if present[name]:
+            continue
+        stats["variant_files"] += 1
+        stats["variant_bytes"] += stored.size
+        if not dry_run:
+            storage.delete(stored.key)
+    return stats
+
+
+def _megabytes(size: int) -> str:
+    return f"{size / 1024 / 1024:.1f} MB"
+
+
+def main():
+    from app.database import engine, create_db_and_tables
+
+    parser = argparse.ArgumentParser(description="Quarantine and delete uploads no note references")
+    parser.add_argument("--batch-size", type=int, default=500, help="Files checked per database query")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be done without changing anything")
+    args = parser.parse_args()
+
+    if not args.dry_run:
+        create_db_and_tables()
+        ensure_file_url_index(engine)
+    storage = get_storage()
+    mode = " (dry run)" if args.dry_run else ""
+    print(f"\n🧹 Collecting orphaned uploads in {storage.name} storage{mode}...\n")
+
+    with Session(engine) as session:
+        purged = purge_quarantine(session, storage, args.batch_size, args.dry_run)
+        quarantined = quarantine_orphans(session, storage, args.batch_size, args.dry_run)
+    variants = delete_stray_variants(storage, args.dry_run)
+
+    print(f"  Scanned {quarantined['scanned']:,} uploads")
+    print(f"  Quarantined {quarantined['quarantined']:,} orphans ({_megabytes(quarantined['quarantined_bytes'])})")
+    print(f"  Restored {purged['restored']:,} referenced files from quarantine")
+    if purged["restored"] and not args.dry_run:
+        print("  (run python -m app.image_utils to rebuild variants of restored images)")
+    print(f"  Deleted {purged['deleted']:,} quarantined files and {variants['variant_files']:,} stray variants")
+    reclaimed = purged["reclaimed_bytes"] + variants["variant_bytes"]
+    print(f"\n✅ Reclaimed {_megabytes(reclaimed)}{mode}\n")
+
+
+if __name__ == "__main__":
+    main()
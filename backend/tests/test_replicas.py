@@ -0,0 +1,102 @@
+"""
+Tests for read-replica routing, using the SQLite stand-in: a primary file
+copied into a replica file with the sqlite3 backup API. Run from the
+backend directory:
+    python -m pytest tests
+"""
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, insert, select
+from sqlmodel import Session
+from starlette.requests import Request
+
+from app import database
+from app.replicas import ReplicaPool, WriteTracker, copy_sqlite
+
+metadata = MetaData()
+items = Table("item", metadata, Column("id", Integer, primary_key=True), Column("name", String))
+
+
+def _request(host: str) -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [], "client": (host, 50000)})
+
+
+def _names(engine):
+    with engine.connect() as conn:
+        return [row.name for row in conn.execute(select(items.c.name).order_by(items.c.id))]
+
+
+@pytest.fixture
+def replicated(tmp_path, monkeypatch):
+    """Primary and replica SQLite files wired into app.database; yields (primary, replica, paths)."""
+    primary_path, replica_path = str(tmp_path / "primary.db"), str(tmp_path / "replica.db")
+    primary = create_engine(f"sqlite:///{primary_path}")
+    metadata.create_all(primary)
+    copy_sqlite(primary_path, replica_path)
+
+    pool = ReplicaPool([f"sqlite:///{replica_path}"], create_engine, check_interval=60)
+    monkeypatch.setattr(database, "engine", primary)
+    monkeypatch.setattr(database, "read_replicas", pool)
+    monkeypatch.setattr(database, "recent_writers", WriteTracker(window=60))
+    yield primary, pool.replicas[0].engine, (primary_path, replica_path)
+    for engine in (primary, pool.replicas[0].engine):
+        engine.dispose()
+
+
+def _write(request: Request, name: str) -> None:
+    sessions = database.get_session(request)
+    session = next(sessions)
+    session.execute(insert(items).values(name=name))
+    session.commit()
+    next(sessions, None)
+
+
+def test_writes_go_to_primary(replicated):
+    primary, replica, _ = replicated
+
+    _write(_request("10.0.0.1"), "first")
+
+    assert _names(primary) == ["first"]
+    assert _names(replica) == []
+
+
+def test_read_after_write_goes_to_primary(replicated):
+    primary, replica, _ = replicated
+    writer = _request("10.0.0.1")
+
+    _write(writer, "first")
+
+    assert database.get_read_engine(writer) is primary
+    assert database.get_read_engine(_request("10.0.0.2")) is replica
+
+
+def test_reads_see_writes_on_replica_after_sync(replicated):
+    primary, replica, (primary_path, replica_path) = replicated
+    _write(_request("10.0.0.1"), "first")
+    reader = _request("10.0.0.2")
+
+    copy_sqlite(primary_path, replica_path)
+
+    sessions = database.get_read_session(reader)
+    session: Session = next(sessions)
+    assert session.get_bind() is replica
+    assert [row.name for row in session.execute(select(items.c.name))] == ["first"]
+    next(sessions, None)
+
+
+def test_reads_fall_back_to_primary_when_replica_is_down(replicated):
+    primary, _, _ = replicated
+    database.read_replicas.choose()  # first health check
+    database.read_replicas.replicas[0].healthy = False
+
+    assert database.get_read_engine(_request("10.0.0.2")) is primary
+
+
+def test_session_without_writes_does_not_pin(replicated):
+    _, replica, _ = replicated
+    reader = _request("10.0.0.3")
+
+    sessions = database.get_session(reader)
+    next(sessions).execute(select(items.c.id))
+    next(sessions, None)
+
+    assert database.get_read_engine(reader) is replica
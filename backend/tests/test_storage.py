@@ -0,0 +1,151 @@
+"""
+Tests for the S3 storage backend and the local -> S3 migration, against moto's
+in-process S3. Run from the backend directory:
+    python -m pytest tests
+"""
+import os
+
+import pytest
+
+pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+from app.storage import LocalStorage, S3Storage, migrate  # noqa: E402
+
+BUCKET = "sl-notes-test"
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    for name, value in {
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_DEFAULT_REGION": "us-east-1",
+    }.items():
+        monkeypatch.setenv(name, value)
+    with moto.mock_aws():
+        storage = S3Storage(BUCKET, prefix="uploads/", region="us-east-1")
+        storage._client.create_bucket(Bucket=BUCKET)
+        yield storage
+
+
+@pytest.fixture
+def local(tmp_path):
+    return LocalStorage(tmp_path / "uploads")
+
+
+def test_save_open_stat(s3):
+    s3.save("a.txt", b"hello")
+
+    assert s3.read("a.txt") == b"hello"
+    stored = s3.stat("a.txt")
+    assert stored.key == "a.txt"
+    assert stored.size == 5
+    assert s3.stat("missing.txt") is None
+    with pytest.raises(FileNotFoundError):
+        s3.open("missing.txt")
+
+
+def test_keys_are_prefixed(s3):
+    s3.save("a.txt", b"hello")
+
+    objects = s3._client.list_objects_v2(Bucket=BUCKET)["Contents"]
+    assert [item["Key"] for item in objects] == ["uploads/a.txt"]
+
+
+def test_save_file_move(s3, tmp_path):
+    path = tmp_path / "b.pdf"
+    path.write_bytes(b"%PDF-1.4")
+
+    s3.save_file("b.pdf", path, move=True)
+
+    assert not path.exists()
+    assert s3.read("b.pdf") == b"%PDF-1.4"
+
+
+def test_list_by_prefix(s3):
+    s3.save("a.txt", b"1")
+    s3.save("variants/a.png/320.webp", b"22")
+    s3.save("variants/a.png/640.webp", b"333")
+
+    assert sorted(stored.key for stored in s3.list()) == [
+        "a.txt", "variants/a.png/320.webp", "variants/a.png/640.webp",
+    ]
+    assert [(stored.key, stored.size) for stored in s3.list("variants/")] == [
+        ("variants/a.png/320.webp", 2), ("variants/a.png/640.webp", 3),
+    ]
+
+
+def test_move_and_delete(s3):
+    s3.save("a.txt", b"hello")
+
+    s3.move("a.txt", "quarantine/20250101000000/a.txt")
+
+    assert s3.stat("a.txt") is None
+    assert s3.read("quarantine/20250101000000/a.txt") == b"hello"
+    assert s3.delete("quarantine/20250101000000/a.txt") is True
+    assert s3.delete("quarantine/20250101000000/a.txt") is False
+
+
+def test_local_copy(s3):
+    s3.save("c.jpg", b"jpeg bytes")
+
+    with s3.local_copy("c.jpg") as path:
+        assert path.suffix == ".jpg"
+        assert path.read_bytes() == b"jpeg bytes"
+    assert not os.path.exists(path)
+
+
+def test_presigned_url(s3):
+    url = s3.presigned_url("a.txt", 60)
+
+    assert BUCKET in url
+    assert "/uploads/a.txt?" in url
+    assert "Signature=" in url
+
+
+def test_migrate_copies_missing_files(local, s3):
+    local.save("a.txt", b"hello")
+    local.save("b.txt", b"world!")
+    local.save("variants/c.png/320.webp", b"webp")
+    s3.save("a.txt", b"hello")
+
+    stats = migrate(local, s3, workers=2)
+
+    assert stats == {"copied": 2, "skipped": 1, "failed": 0, "bytes": 10}
+    assert s3.read("b.txt") == b"world!"
+    assert s3.read("variants/c.png/320.webp") == b"webp"
+    assert local.stat("b.txt") is not None
+
+
+def test_migrate_recopies_different_size(local, s3):
+    local.save("a.txt", b"hello")
+    s3.save("a.txt", b"stale")
+    local.save("b.txt", b"longer body")
+    s3.save("b.txt", b"short")
+
+    stats = migrate(local, s3, workers=2)
+
+    assert stats["copied"] == 1
+    assert stats["skipped"] == 1
+    assert s3.read("b.txt") == b"longer body"
+
+
+def test_migrate_delete_source(local, s3):
+    local.save("a.txt", b"hello")
+    local.save("variants/c.png/320.webp", b"webp")
+
+    stats = migrate(local, s3, workers=2, delete_source=True)
+
+    assert stats["copied"] == 2
+    assert list(local.list()) == []
+    assert s3.read("a.txt") == b"hello"
+
+
+def test_migrate_s3_to_local(local, s3):
+    s3.save("a.txt", b"hello")
+
+    stats = migrate(s3, local, workers=1)
+
+    assert stats["copied"] == 1
+    assert local.read("a.txt") == b"hello"
@@ -2,8 +2,7 @@ import React, { useState, useEffect, useRef } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
 import { Search, BookOpen, GraduationCap, ArrowRight, FileText, Users, TrendingUp, Sparkles, Award, Clock } from 'lucide-react';
 import { useTheme } from '../context/ThemeContext';
-import { subjectService } from '../services/subjectService';
-import { noteService } from '../services/noteService';
+import { feedService } from '../services/feedService';
 import type { Subject, Note } from '../types';
 
 // Animated Counter Component
@@ -79,12 +78,9 @@ const ModernHomePage: React.FC = () => {
     useEffect(() => {
         const loadData = async () => {
             try {
-                const [subjectsData, notesData] = await Promise.all([
-                    subjectService.getAll(),
-                    noteService.getAll({ per_page: 6 }),
-                ]);
-                setSubjects(subjectsData);
-                setRecentNotes(notesData.notes);
+                const feed = await feedService.getHome();
+                setSubjects(feed.subjects);
+                setRecentNotes(feed.recent_notes);
             } catch (error) {
                 console.error('Failed to load data:', error);
             } finally {
@@ -3,12 +3,25 @@ import { Link, useSearchParams, useNavigate } from 'react-router-dom';
 import { Search, FileText, Eye, Calendar } from 'lucide-react';
 import { useTheme } from '../context/ThemeContext';
 import { noteService } from '../services/noteService';
-import type { Note } from '../types';
+import type { SearchHit } from '../types';
+
+// Render a snippet with the server-provided highlight ranges wrapped in <mark>
+const renderSnippet = (hit: SearchHit) => {
+    const parts: React.ReactNode[] = [];
+    let cursor = 0;
+    hit.highlights.forEach(([start, end], i) => {
+        parts.push(hit.snippet.slice(cursor, start));
+        parts.push(<mark key={i}>{hit.snippet.slice(start, end)}</mark>);
+        cursor = end;
+    });
+    parts.push(hit.snippet.slice(cursor));
+    return parts;
+};
 
 const SearchPage: React.FC = () => {
     const [searchParams] = useSearchParams();
     const [searchQuery, setSearchQuery] = useState(searchParams.get('q') || '');
-    const [results, setResults] = useState<Note[]>([]);
+    const [results, setResults] = useState<SearchHit[]>([]);
     const [loading, setLoading] = useState(false);
     const { theme } = useTheme();
     const navigate = useNavigate();
@@ -138,7 +151,7 @@ const SearchPage: React.FC = () => {
                                                 {note.title}
                                             </h3>
                                             <p style={{ color: isDark ? '#9ca3af' : '#6b7280', fontSize: '14px', lineHeight: 1.6, marginBottom: '16px' }}>
-                                                {note.content.substring(0, 150)}...
+                                                {renderSnippet(note)}
                                             </p>
                                             <div style={{ display: 'flex', gap: '16px', color: isDark ? '#9ca3af' : '#6b7280', fontSize: '13px' }}>
                                                 <span style={{ display: 'flex', alignItems: 'center', gap: '4px' }}>
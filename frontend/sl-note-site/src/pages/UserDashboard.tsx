@@ -3,7 +3,7 @@ import { Link, useNavigate } from 'react-router-dom';
 import { BookOpen, Eye, FileText, Clock, TrendingUp, Plus } from 'lucide-react';
 import { useAuth } from '../context/AuthContext';
 import { useTheme } from '../context/ThemeContext';
-import { noteService } from '../services/noteService';
+import { feedService } from '../services/feedService';
 import type { Note } from '../types';
 
 const UserDashboard: React.FC = () => {
@@ -26,12 +26,9 @@ const UserDashboard: React.FC = () => {
 
     const loadData = async () => {
         try {
-            const [myNotes, allNotes] = await Promise.all([
-                noteService.getUserNotes(),
-                noteService.getAll({ per_page: 5 }),
-            ]);
-            setUserNotes(myNotes);
-            setRecentNotes(allNotes.notes || []);
+            const feed = await feedService.getDashboard();
+            setUserNotes(feed.my_notes);
+            setRecentNotes(feed.recent_notes || []);
         } catch (error) {
             console.error('Failed to load data:', error);
         } finally {
@@ -20,6 +20,18 @@ export const adminService = {
         return response.data;
     },
 
+    // Verify or unverify many users at once
+    async bulkUpdateUsers(data: {
+        action: 'verify' | 'unverify';
+        ids?: number[];
+        is_verified?: boolean;
+        email_domain?: string;
+        dry_run?: boolean;
+    }) {
+        const response = await api.post('/admin/users/bulk', data);
+        return response.data;
+    },
+
     // Delete user
     async deleteUser(userId: number) {
         const response = await api.delete(`/admin/users/${userId}`);
@@ -37,6 +49,19 @@ export const adminService = {
         const response = await api.put(`/admin/notes/${noteId}/publish`);
         return response.data;
     },
+
+    // Publish, unpublish or delete many notes at once
+    async bulkUpdateNotes(data: {
+        action: 'publish' | 'unpublish' | 'delete';
+        ids?: number[];
+        subject_id?: number;
+        author_id?: number;
+        is_published?: boolean;
+        dry_run?: boolean;
+    }) {
+        const response = await api.post('/admin/notes/bulk', data);
+        return response.data;
+    },
 };
 
 export default adminService;
@@ -0,0 +1,18 @@
+import api from './api';
+import type { HomeFeed, DashboardFeed } from '../types';
+
+export const feedService = {
+    // Subjects (with note counts) and recent notes for the home page
+    async getHome(): Promise<HomeFeed> {
+        const response = await api.get<HomeFeed>('/feed/home');
+        return response.data;
+    },
+
+    // Current user's notes and recent notes for the dashboard
+    async getDashboard(): Promise<DashboardFeed> {
+        const response = await api.get<DashboardFeed>('/feed/dashboard');
+        return response.data;
+    },
+};
+
+export default feedService;
@@ -1,5 +1,5 @@
 import api from './api';
-import type { Note, NoteCreate, NoteUpdate, NoteListResponse, SearchResponse } from '../types';
+import type { Note, NoteCreate, NoteUpdate, NoteListResponse, NoteBatchResponse, SearchHit, SearchResponse } from '../types';
 
 export const noteService = {
     // Get notes list with pagination
@@ -25,6 +25,14 @@ export const noteService = {
         return response.data;
     },
 
+    // Get several notes in one request (does not count as views)
+    async getBatch(ids: number[]): Promise<NoteBatchResponse> {
+        const response = ids.length > 100
+            ? await api.post<NoteBatchResponse>('/notes/batch', { ids })
+            : await api.get<NoteBatchResponse>('/notes/batch', { params: { ids: ids.join(',') } });
+        return response.data;
+    },
+
     // Create note
     async create(data: NoteCreate): Promise<Note> {
         const response = await api.post<Note>('/notes', data);
@@ -53,7 +61,8 @@ export const noteService = {
         exam_type?: 'OL' | 'AL';
         subject_id?: number;
         limit?: number;
-    }): Promise<Note[]> {
+        include_content?: boolean;
+    }): Promise<SearchHit[]> {
         const response = await api.get<SearchResponse>('/search', {
             params: { q: query, ...params },
         });
@@ -43,6 +43,10 @@ export interface Subject {
     created_at: string;
 }
 
+export interface SubjectWithCount extends Subject {
+    note_count: number;
+}
+
 export interface SubjectCreate {
     name: string;
     exam_type: 'OL' | 'AL';
@@ -90,10 +94,44 @@ export interface NoteListResponse {
     pages: number;
 }
 
-export interface SearchResponse {
+export interface NoteBatchResponse {
     notes: Note[];
+    missing: number[];
+}
+
+export interface SearchHit extends Omit<Note, 'content'> {
+    snippet: string;
+    highlights: [number, number][];
+    content: string | null;
+}
+
+export interface FacetCount {
+    value: number | string;
+    count: number;
+}
+
+export interface SearchFacets {
+    subject_id: FacetCount[];
+    exam_type: FacetCount[];
+    topic: FacetCount[];
+}
+
+export interface SearchResponse {
+    notes: SearchHit[];
     total: number;
     query: string;
+    facets?: SearchFacets | null;
+}
+
+// Feed types
+export interface HomeFeed {
+    subjects: SubjectWithCount[];
+    recent_notes: Note[];
+}
+
+export interface DashboardFeed {
+    my_notes: Note[];
+    recent_notes: Note[];
 }
 
 // API Response types